@@ -0,0 +1,74 @@
+'''
+batch.py
+
+Converts several logs at once for `pn2ps --jobs`, each in its own worker
+process, so that one bad log does not stop the others. Also holds what the
+other users of a process pool (`--split-hands`, `--inbox` and
+`pn2ps-server`) share.
+'''
+
+import signal
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+# hands sent to a worker at a time when a log is split across workers; large
+# enough that pickling rows back and forth doesn't dominate the work done on them
+HANDS_PER_CHUNK = 32
+
+def ignore_sigint():
+    '''
+    Leave Ctrl-C to the main process, so that it can stop workers cleanly, and
+    let a worker the pool terminates exit quietly, rather than raising
+    `KeyboardInterrupt` as the daemons' main processes do on SIGTERM
+    '''
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def submit_in_order(executor: Executor, fn: Callable, items: Iterable[tuple], in_flight: int) -> Iterator[Future]:
+    '''
+    Submit `fn(*item)` to `executor` for each of `items`, yielding the futures
+    in the order of `items`. At most `in_flight` are submitted ahead of the
+    caller, so that memory tracks the pool rather than the number of items.
+    Futures not yet yielded are cancelled if the caller stops early.
+    '''
+    pending: Deque[Future] = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, *item))
+            if len(pending) >= in_flight:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+    finally:
+        for future in pending:
+            future.cancel()
+
+def describe_error(e: BaseException) -> str:
+    return f"{type(e).__name__}: {e}"
+
+def convert_logs(convert_log: Callable[[str], int], filenames: List[str], jobs: int) -> Dict[str, Optional[str]]:
+    '''
+    Call `convert_log`, which returns the number of hands it converted, on
+    each of `filenames` in a pool of `jobs` processes. Returns a map from
+    filename to `None` on success or to the error that stopped it, and prints
+    a summary in the order of `filenames`.
+    '''
+    failures: Dict[str, Optional[str]] = {}
+    converted: Dict[str, int] = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(convert_log, filename): filename for filename in filenames}
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                converted[filename] = future.result()
+                failures[filename] = None
+            except Exception as e:
+                failures[filename] = describe_error(e)
+
+    for filename in filenames:
+        if failures[filename] is None:
+            print(f"OK      {filename} ({converted[filename]} hands)")
+        else:
+            print(f"FAILED  {filename}: {failures[filename]}")
+    return failures
@@ -0,0 +1,142 @@
+'''
+cache.py
+
+On-disk caches of parsed and rendered hands. Converting the same logs again,
+e.g., with a different multiplier, name map or site, can then skip parsing any
+log that hasn't changed since it was cached, and skip rendering any hand whose
+lines and render options haven't changed.
+'''
+
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Dict, List, Optional, Set, Tuple
+from game import PARSER_VERSION
+from hand import Hand, RENDERER_VERSION
+from reader import open_log, split_archive_path
+
+def entry_name(filename: str) -> str:
+    '''
+    Name cache entries for a log after its absolute path, so that each log has
+    one entry that is replaced whenever the log changes
+    '''
+    return hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()
+
+def write_atomically(path: str, *objs):
+    '''
+    Pickle each of `objs` in turn to `path`. Readers see either the old file or
+    the new one, never part of one.
+    '''
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for obj in objs:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+class GameCache:
+    '''
+    Parsed hands stored in `directory`, one entry per log. An entry is only used
+    while the log's size, mtime and content hash and the parser version all
+    match the ones it was stored with.
+    '''
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def key(self, filename: str) -> Tuple[int, int, int, str]:
+        '''
+        Return `(parser version, size, mtime, content hash)` for the log
+        `filename`. The size and mtime are those of the file holding it, which
+        is the archive for a log in one.
+        '''
+        stat = os.stat(split_archive_path(filename)[0])
+        digest = hashlib.sha256()
+        with open_log(filename) as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return PARSER_VERSION, stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+    def entry_path(self, filename: str) -> str:
+        return os.path.join(self.directory, f"{entry_name(filename)}.pickle")
+
+    def load(self, filename: str, key: Tuple[int, int, int, str]) -> Optional[List[Hand]]:
+        '''
+        Return the hands cached for `filename` under `key`, or `None` if there
+        aren't any
+        '''
+        try:
+            with open(self.entry_path(filename), 'rb') as f:
+                # the key is pickled on its own so that a stale entry is
+                # rejected without loading its hands
+                if pickle.load(f) != key:
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # an entry from an older version or a partial write; parse again
+            print(f"Ignoring unreadable cache entry for {filename}: {e}")
+            return None
+
+    def store(self, filename: str, key: Tuple[int, int, int, str], hands: List[Hand]):
+        '''
+        Cache `hands`, which must have been parsed without a name map, for `filename`
+        '''
+        write_atomically(self.entry_path(filename), key, hands)
+
+# (renderer version, site, hero, multiplier, table name, chip formatter, seats,
+#  players' names, dealer id, hand id, hash of the hand's lines)
+RenderKey = Tuple[int, str, str, float, str, str, int, Tuple[str, ...], Optional[str], int, bytes]
+
+def render_key(hand: Hand, site: str, hero_name: str, multiplier: float, table_name: str) -> RenderKey:
+    '''
+    Everything that decides how `hand` renders. The names of the hand's players
+    stand in for the name map: only mapped names that appear in the hand
+    affect it, and those are already applied to its players. The dealer is
+    included because dead button hands take it from earlier hands.
+    '''
+    return (RENDERER_VERSION, site, hero_name, multiplier, table_name,
+            getattr(hand.chip_formatter, '__qualname__', repr(hand.chip_formatter)), hand.num_seats,
+            tuple(p.name for p in hand.players), hand.dealer and hand.dealer.id, hand.id,
+            hashlib.sha1("\n".join(hand.lines).encode()).digest())
+
+class RenderCache:
+    '''
+    The rendered hands of one log, stored in `directory`. `store` keeps only
+    the renders looked up or added with `get` and `put` since it was loaded,
+    i.e., those of the last run, so that the cache doesn't grow with every
+    set of options the log is ever converted with, nor keep hands that are no
+    longer in the log.
+    '''
+    def __init__(self, directory: str, filename: str):
+        self.path = os.path.join(directory, f"{entry_name(filename)}.renders.pickle")
+        self.renders: Dict[RenderKey, str] = self.load()
+        # the keys looked up or added since loading
+        self.used: Set[RenderKey] = set()
+
+    def load(self) -> Dict[RenderKey, str]:
+        try:
+            with open(self.path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Ignoring unreadable render cache {self.path}: {e}")
+            return {}
+
+    def get(self, key: RenderKey) -> Optional[str]:
+        self.used.add(key)
+        return self.renders.get(key)
+
+    def put(self, key: RenderKey, descr: str):
+        self.used.add(key)
+        self.renders[key] = descr
+
+    def store(self):
+        write_atomically(self.path, {key: self.renders[key] for key in self.used if key in self.renders})
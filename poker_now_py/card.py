@@ -7,6 +7,7 @@ Copyright © 2020 Say Goodnight Software. All rights reserved.
 '''
 
 from enum import Enum, unique
+from typing import Dict, Iterable, List
 
 @unique
 class EmojiCard(Enum):
@@ -69,62 +70,7 @@ class EmojiCard(Enum):
     error = "Error"
     
     def emojiFlip(self):
-        if self == EmojiCard.c2: return Card.c2
-        elif self == EmojiCard.c3: return Card.c3
-        elif self == EmojiCard.c4: return Card.c4
-        elif self == EmojiCard.c5: return Card.c5
-        elif self == EmojiCard.c6: return Card.c6
-        elif self == EmojiCard.c7: return Card.c7
-        elif self == EmojiCard.c8: return Card.c8
-        elif self == EmojiCard.c9: return Card.c9
-        elif self == EmojiCard.cT: return Card.cT
-        elif self == EmojiCard.cJ: return Card.cJ
-        elif self == EmojiCard.cQ: return Card.cQ
-        elif self == EmojiCard.cK: return Card.cK
-        elif self == EmojiCard.cA: return Card.cA
-
-        elif self == EmojiCard.d2: return Card.d2
-        elif self == EmojiCard.d3: return Card.d3
-        elif self == EmojiCard.d4: return Card.d4
-        elif self == EmojiCard.d5: return Card.d5
-        elif self == EmojiCard.d6: return Card.d6
-        elif self == EmojiCard.d7: return Card.d7
-        elif self == EmojiCard.d8: return Card.d8
-        elif self == EmojiCard.d9: return Card.d9
-        elif self == EmojiCard.dT: return Card.dT
-        elif self == EmojiCard.dJ: return Card.dJ
-        elif self == EmojiCard.dQ: return Card.dQ
-        elif self == EmojiCard.dK: return Card.dK
-        elif self == EmojiCard.dA: return Card.dA
-
-        elif self == EmojiCard.h2: return Card.h2
-        elif self == EmojiCard.h3: return Card.h3
-        elif self == EmojiCard.h4: return Card.h4
-        elif self == EmojiCard.h5: return Card.h5
-        elif self == EmojiCard.h6: return Card.h6
-        elif self == EmojiCard.h7: return Card.h7
-        elif self == EmojiCard.h8: return Card.h8
-        elif self == EmojiCard.h9: return Card.h9
-        elif self == EmojiCard.hT: return Card.hT
-        elif self == EmojiCard.hJ: return Card.hJ
-        elif self == EmojiCard.hQ: return Card.hQ
-        elif self == EmojiCard.hK: return Card.hK
-        elif self == EmojiCard.hA: return Card.hA
-
-        elif self == EmojiCard.s2: return Card.s2
-        elif self == EmojiCard.s3: return Card.s3
-        elif self == EmojiCard.s4: return Card.s4
-        elif self == EmojiCard.s5: return Card.s5
-        elif self == EmojiCard.s6: return Card.s6
-        elif self == EmojiCard.s7: return Card.s7
-        elif self == EmojiCard.s8: return Card.s8
-        elif self == EmojiCard.s9: return Card.s9
-        elif self == EmojiCard.sT: return Card.sT
-        elif self == EmojiCard.sJ: return Card.sJ
-        elif self == EmojiCard.sQ: return Card.sQ
-        elif self == EmojiCard.sK: return Card.sK
-        elif self == EmojiCard.sA: return Card.sA
-        return Card.error
+        return EMOJI_FLIP[self]
 
 
 class Card(Enum):
@@ -184,3 +130,38 @@ class Card(Enum):
     sK = "Ks"
     sA = "As"
     error = "Error"
+
+EMOJI_FLIP: Dict[EmojiCard, Card] = {e: Card[e.name] for e in EmojiCard}
+
+# Cards are coded as ints: suit * 13 + rank, with suits in the order clubs,
+# diamonds, hearts, spades and ranks from 2 up to ace. ERROR_CARD stands in for
+# anything in the log that isn't a card.
+ERROR_CARD = 52
+
+# PokerNow emoji text -> card
+EMOJI_INDEX: Dict[str, int] = {e.value: i for i, e in enumerate(EmojiCard)}
+
+# card -> PokerStars text
+CARD_TEXT: List[str] = [c.value for c in Card]
+
+def parse_card(value: str) -> int:
+    '''
+    Return the card for PokerNow's `value` (e.g., `10♥`), or `ERROR_CARD` if it isn't one
+    '''
+    return EMOJI_INDEX.get(value, ERROR_CARD)
+
+def cards_text(cards: Iterable[int]) -> str:
+    '''
+    PokerStars text for `cards`, separated by spaces (e.g., `Th 9c`)
+    '''
+    return ' '.join([CARD_TEXT[c] for c in cards])
+
+def card_mask(cards: Iterable[int]) -> int:
+    '''
+    Return `cards` as a 52 bit set, leaving out any `ERROR_CARD`s
+    '''
+    mask = 0
+    for c in cards:
+        if c != ERROR_CARD:
+            mask |= 1 << c
+    return mask
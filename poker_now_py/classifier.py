@@ -0,0 +1,198 @@
+'''
+classifier.py
+
+Classifies PokerNow.club log lines into `Event`s. A line is dispatched on its
+first character (and, for player lines, on the verb after the player) to a
+precompiled pattern that captures the player id, amount and cards in one
+pass, so classifying a line costs the same however many kinds of lines the
+log format has.
+'''
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from card import parse_card
+from event import Event, EventKind
+from util import first, last
+
+# "Mo @ hOW39c8CLs" raises to 18.00 and go all in
+PLAYER_LINE = re.compile(r'"(?P<name>[^"]*) @ (?P<id>[^"]*)" (?P<verb>\S+) ?(?P<rest>.*)', re.DOTALL)
+# -- starting hand #312  (No Limit Texas Hold'em) (dealer: "Mo @ hOW39c8CLs") --
+STARTING_HAND = re.compile(r'-- starting hand #(?P<number>\S+)')
+# #1 "mochi @ TkNg6TEK0X" (407.30)
+SEAT = re.compile(r'#(?P<number>\d+) "(?P<name>[^"]*) @ (?P<id>[^"]*)" \((?P<stack>[^)]*)\)')
+# River (second run): 6♦, 9♥, 8♣, A♠ [2♠]
+BOARD = re.compile(r'(?P<street>Flop|Turn|River)(?P<second_run> \(second run\))?:[^\[]*(?:\[(?P<cards>[^\]]*)\])?')
+# to 18.00 and go all in
+RAISE = re.compile(r'to (?P<amount>\S+)')
+# a missing small blind of 1.00
+POST = re.compile(r'a (?P<blind>.*?) of (?P<amount>\S+)')
+# 270.00 from pot with Three of a Kind, 8's (combination: 8♠, 8♦, 8♣, A♠, 9♥)
+COLLECT = re.compile(r'(?P<amount>\S+) from pot(?: with (?P<description>.*))?', re.DOTALL)
+# Uncalled bet of 6.00 returned to "Mo @ hOW39c8CLs"
+UNCALLED = re.compile(r'Uncalled bet of (?P<amount>\S+)')
+
+RUN_IT_TWICE = "all players in hand choose to run it twice."
+
+def parse_amount(amount: Optional[str]) -> float:
+    '''
+    Parse a chip amount from the log, treating anything unreadable as 0
+    '''
+    try:
+        return float(amount)
+    except (TypeError, ValueError):
+        return 0.0
+
+def parse_dealer_id(msg: str) -> Optional[str]:
+    '''
+    Return the dealer's id from a `-- starting hand` line with a dealer
+    '''
+    unparsed_dealer = last(msg.split(' (dealer: "')).replace('") --', "")
+
+    # for legacy logs
+    dealer_separator = " @ "
+    if unparsed_dealer and " # " in unparsed_dealer:
+        dealer_separator = " # "
+
+    dealer_name_ids = unparsed_dealer and unparsed_dealer.split(dealer_separator)
+    return dealer_name_ids and last(dealer_name_ids)
+
+def parse_seats(msg: str) -> List[Tuple[int, str, str, float]]:
+    '''
+    Return `(seat number, name, id, stack)` for each player on a `Player stacks` line
+    '''
+    return [(int(m.group('number')), m.group('name'), m.group('id'), parse_amount(m.group('stack') or "0"))
+            for m in SEAT.finditer(msg)]
+
+def first_amount(rest: str) -> float:
+    # 67.50 and go all in
+    return parse_amount(rest.split(" ", 1)[0])
+
+def bets(player_id: str, rest: str) -> Event:
+    return Event(EventKind.bet, player_id, amount=first_amount(rest))
+
+def raises(player_id: str, rest: str) -> Optional[Event]:
+    m = RAISE.match(rest)
+    return m and Event(EventKind.raise_to, player_id, amount=parse_amount(m.group('amount')))
+
+def calls(player_id: str, rest: str) -> Event:
+    return Event(EventKind.call, player_id, amount=first_amount(rest))
+
+def checks(player_id: str, rest: str) -> Event:
+    return Event(EventKind.check, player_id)
+
+def folds(player_id: str, rest: str) -> Event:
+    return Event(EventKind.fold, player_id)
+
+def shows(player_id: str, rest: str) -> Optional[Event]:
+    # a 8♠, 8♦.
+    if not rest.startswith("a "):
+        return None
+    cards = rest[2:].replace(".", "").split(", ")
+    return Event(EventKind.show, player_id, cards=tuple(parse_card(c) for c in cards))
+
+def collected(player_id: str, rest: str) -> Optional[Event]:
+    m = COLLECT.match(rest)
+    if not m:
+        return None
+    description = m.group('description')
+    if description is not None:
+        description = first(description.split(" ("))
+    return Event(EventKind.collect, player_id, amount=parse_amount(m.group('amount')), info=description,
+                 second_run=description is not None and "on the second run" in rest)
+
+def posts(player_id: str, rest: str) -> Optional[Event]:
+    m = POST.match(rest)
+    return m and Event(EventKind.post, player_id, amount=parse_amount(m.group('amount')), info=m.group('blind'))
+
+PLAYER_VERBS: Dict[str, Callable[[str, str], Optional[Event]]] = {
+    "bets": bets,
+    "raises": raises,
+    "calls": calls,
+    "checks": checks,
+    "folds": folds,
+    "shows": shows,
+    "collected": collected,
+    "posts": posts,
+}
+
+def parse_player_action(msg: str) -> Optional[Event]:
+    '''
+    Parse a line that starts with a quoted player, such as
+    `"Mo @ hOW39c8CLs" raises to 18.00 and go all in`. Returns `None` for lines
+    that aren't hand actions (e.g., `"Mo @ hOW39c8CLs" chooses to  run it twice.`)
+    '''
+    m = PLAYER_LINE.match(msg)
+    if not m:
+        return None
+    verb = PLAYER_VERBS.get(m.group('verb'))
+    return verb and verb(m.group('id'), m.group('rest'))
+
+def parse_starting_hand(msg: str) -> Optional[Event]:
+    # the dealer id is None for dead button hands
+    m = STARTING_HAND.match(msg)
+    dealer_id = None if "dead button" in msg else parse_dealer_id(msg)
+    return Event(EventKind.start, dealer_id, info=m and m.group('number'))
+
+def parse_ending_hand(msg: str) -> Event:
+    return Event(EventKind.end)
+
+def parse_stacks(msg: str) -> Event:
+    return Event(EventKind.stacks)
+
+def parse_hole(msg: str) -> Event:
+    # Your hand is Q♠, Q♥
+    return Event(EventKind.hole, cards=tuple(parse_card(c.strip()) for c in msg[len("Your hand is "):].split(", ")))
+
+def parse_board(msg: str) -> Optional[Event]:
+    # The cards in brackets are the ones this line deals
+    m = BOARD.match(msg)
+    if not m:
+        return None
+    cards = m.group('cards')
+    return Event(EventKind.board,
+                 cards=tuple(parse_card(c) for c in (cards.split(", ") if cards is not None else ["Error"])),
+                 street=m.group('street').lower(),
+                 second_run=m.group('second_run') is not None)
+
+def parse_uncalled(msg: str) -> Optional[Event]:
+    m = UNCALLED.match(msg)
+    return m and Event(EventKind.uncalled, amount=parse_amount(m.group('amount')))
+
+def parse_run_it_twice(msg: str) -> Optional[Event]:
+    return Event(EventKind.run_it_twice) if msg.lower().startswith(RUN_IT_TWICE) else None
+
+# first character of a line -> (prefix, parser) pairs for lines starting with it
+LINE_PARSERS: Dict[str, List[Tuple[str, Callable[[str], Optional[Event]]]]] = {
+    '"': [('"', parse_player_action)],
+    '-': [("-- starting hand ", parse_starting_hand), ("-- ending hand ", parse_ending_hand)],
+    'P': [("Player stacks", parse_stacks)],
+    'Y': [("Your hand is ", parse_hole)],
+    'F': [("Flop", parse_board)],
+    'T': [("Turn", parse_board)],
+    'R': [("River", parse_board)],
+    'U': [("Uncalled bet", parse_uncalled)],
+    'A': [("", parse_run_it_twice)],
+    'a': [("", parse_run_it_twice)],
+}
+
+# how a line has to start for `classify` to return an event for it
+HAND_LINE_STARTS: Tuple[str, ...] = tuple(prefix or first for first, parsers in LINE_PARSERS.items() for prefix, _ in parsers)
+
+def is_hand_line(msg: Optional[str]) -> bool:
+    '''
+    Whether `classify` might return an event for `msg`, which is cheaper to
+    tell than classifying it. Everything else can be skipped.
+    '''
+    return bool(msg) and msg.startswith(HAND_LINE_STARTS)
+
+def classify(msg: Optional[str]) -> Optional[Event]:
+    '''
+    Classify a log line, returning `None` for lines that don't affect a hand
+    (chat, seat requests, stack changes, ...)
+    '''
+    if not msg:
+        return None
+    for prefix, parser in LINE_PARSERS.get(msg[0], ()):
+        if msg.startswith(prefix):
+            return parser(msg)
+    return None
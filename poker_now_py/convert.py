@@ -0,0 +1,114 @@
+'''
+convert.py
+
+Convert PokerNow.club logs from Python, without going through `pn2ps`'s
+command line:
+
+    from convert import convert
+
+    with open("log.csv", "rb") as f:
+        for history in convert(f, hero="Hero", site="swc"):
+            ...
+
+Nothing here prints or reads `sys.argv`.
+'''
+
+import mmap
+from typing import Callable, Dict, IO, Iterable, Iterator, Optional, Union
+
+from game import Game
+from hand import CHIP_FORMATTERS, Hand
+from ordering import sort_rows
+from reader import Row, as_row, iter_buffer_rows_oldest_first
+
+SITES = ("pokerstars", "swc")
+
+Rows = Iterable[Union[Row, Dict[str, str]]]
+Source = Union[bytes, bytearray, IO, Rows]
+
+def describe_hand(hand: Hand, site: str, hero_name: str, multiplier: float = 1.0, table_name: str = "DGen") -> str:
+    '''
+    Render `hand` in `site`'s format (`pokerstars` or `swc`)
+    '''
+    if site == "swc":
+        return hand.get_swc_description(hero_name=hero_name, multiplier=multiplier, table_name=table_name)
+    return hand.get_poker_stars_description(hero_name=hero_name, multiplier=multiplier, table_name=table_name)
+
+def iter_source_rows(source: Source, oldest_first: bool = False) -> Iterator[Row]:
+    '''
+    Yield the rows of `source` oldest first. `source` is one of:
+
+    + a csv log as `bytes`
+    + a csv log opened as a file, in binary or text mode
+    + `(entry, at, order)` tuples, or rows such as those of a `csv.DictReader`
+      with at least those columns, in PokerNow's export order
+      (newest first) unless `oldest_first`
+
+    Rows of a csv log that can't affect a hand are left out.
+    '''
+    if isinstance(source, (bytes, bytearray)):
+        yield from iter_buffer_rows_oldest_first(bytes(source), hand_lines_only=True)
+    elif hasattr(source, 'read'):
+        try:
+            # map real files rather than reading them into memory
+            mm = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            data = source.read()
+            yield from iter_buffer_rows_oldest_first(data.encode('utf-8') if isinstance(data, str) else data, hand_lines_only=True)
+        else:
+            with mm:
+                yield from iter_buffer_rows_oldest_first(mm, hand_lines_only=True)
+    elif oldest_first:
+        yield from map(as_row, source)
+    else:
+        yield from map(as_row, reversed(list(source)))
+
+def convert(source: Source, *,
+            hero: str,
+            site: str = "pokerstars",
+            multiplier: float = 1.0,
+            table_name: str = "DGen",
+            chip_formatter: Union[str, Callable[[float], str]] = "usd",
+            name_map: Optional[Dict[str, str]] = None,
+            seats: int = 10,
+            oldest_first: bool = False,
+            sort: bool = False,
+            on_error: Optional[Callable[[Hand, Exception], None]] = None) -> Iterator[str]:
+    '''
+    Convert the log `source` (see `iter_source_rows`) to `site`'s hand history
+    format, yielding one hand history per hand as each hand is parsed, so that
+    neither the log's hands nor their histories need to be held in memory.
+
+    `chip_formatter` is either a name from `hand.CHIP_FORMATTERS` or a function
+    formatting an amount of chips. Hands that can't be rendered are left out,
+    and passed to `on_error` along with the exception if it is given. A log
+    too old for the parser yields nothing. With `sort`, rows are put in
+    `order` first, for logs that aren't exactly in export order.
+    '''
+    if site not in SITES:
+        raise ValueError(f"unknown site: {site}")
+    if isinstance(chip_formatter, str):
+        if chip_formatter not in CHIP_FORMATTERS:
+            raise ValueError(f"unknown chip formatter: {chip_formatter}")
+        chip_formatter = CHIP_FORMATTERS[chip_formatter]
+
+    game = Game(name_map=name_map, num_seats=seats, chip_formatter=chip_formatter)
+    game.show_errors = False
+    # a separate generator so that bad options are raised on the call itself
+    rows = iter_source_rows(source, oldest_first)
+    if sort:
+        rows = sort_rows(rows)
+    return iter_histories(game.iter_hands(rows), site,
+                          hero_name=hero, multiplier=multiplier or 1.0, table_name=table_name or "DGen", on_error=on_error)
+
+def iter_histories(hands: Iterable[Hand], site: str, hero_name: str, multiplier: float, table_name: str,
+                   on_error: Optional[Callable[[Hand, Exception], None]] = None) -> Iterator[str]:
+    '''
+    Render each of `hands` that can be rendered, as in `convert`
+    '''
+    for hand in hands:
+        try:
+            yield describe_hand(hand, site, hero_name=hero_name, multiplier=multiplier, table_name=table_name)
+        except Exception as e:
+            if on_error is not None:
+                on_error(hand, e)
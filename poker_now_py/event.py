@@ -0,0 +1,62 @@
+'''
+event.py
+
+Typed hand events. `Game` parses each log line once into an `Event`, and the
+hand history renderers walk a hand's events instead of re-reading its lines.
+'''
+
+from enum import Enum, unique
+from typing import NamedTuple, Optional, Tuple
+
+@unique
+class EventKind(Enum):
+    start = "start"                 # -- starting hand #1 ...
+    end = "end"                     # -- ending hand #1 --
+    stacks = "stacks"               # Player stacks: ...
+    hole = "hole"                   # Your hand is ...
+    post = "post"                   # blinds and straddles
+    bet = "bet"
+    raise_to = "raise_to"
+    call = "call"
+    check = "check"
+    fold = "fold"
+    show = "show"
+    collect = "collect"
+    uncalled = "uncalled"           # Uncalled bet of ... returned to ...
+    run_it_twice = "run_it_twice"   # All players in hand choose to run it twice.
+    board = "board"                 # Flop/Turn/River, including second runs
+
+class Event(NamedTuple):
+    '''
+    A single parsed log line. Fields that don't apply to `kind` keep their defaults:
+
+    + `player_id`: the acting player's PokerNow id, or the dealer's for `start`
+      (`None` if the hand has a dead button)
+    + `amount`: chips as logged, before any multiplier is applied
+    + `cards`: hole cards, shown cards, or the cards a board line adds, coded as
+      in `card.CARD_TEXT`
+    + `street`: `flop`, `turn` or `river` for board events
+    + `info`: the blind posted (`small blind`, `big blind`, `missing small blind`,
+      `missed big blind` or `straddle`), the winning hand of a showdown collect,
+      or the PokerNow hand number of a `start`
+    + `second_run`: the board or collect belongs to the second run of the hand
+    '''
+    kind: EventKind
+    player_id: Optional[str] = None
+    amount: float = 0.0
+    cards: Tuple[int, ...] = ()
+    street: Optional[str] = None
+    info: Optional[str] = None
+    second_run: bool = False
+
+    @property
+    def is_player_action(self) -> bool:
+        '''
+        Actions that hand histories list after the hole cards are dealt
+        '''
+        if self.kind == EventKind.post:
+            return self.info == "straddle"
+        return self.kind in PLAYER_ACTIONS
+
+PLAYER_ACTIONS = frozenset([EventKind.bet, EventKind.raise_to, EventKind.call, EventKind.check,
+                            EventKind.fold, EventKind.show, EventKind.collect])
@@ -0,0 +1,121 @@
+'''
+follow.py
+
+Converts a PokerNow log while it is still being written, for `pn2ps --follow`.
+
+A followed log may grow in either of two ways:
+
++ rows are appended to it, oldest first, in which case only the bytes after
+  the last complete record read are read again
++ it is rewritten by a newer PokerNow export, newest first, in which case only
+  the new rows at the top of the file are read
+
+Either way rows are fed through one `Game` in `order`, and rows whose `order`
+has already been seen are dropped. As when converting a whole log, a hand is
+only complete once the next one starts, since cards may be shown after its
+`-- ending hand` line, so what is converted doesn't depend on when the log is
+polled.
+'''
+
+import mmap
+import os
+from itertools import islice
+from typing import List, Optional, Tuple
+from game import Game
+from hand import Hand
+from reader import AT, ENTRY, ORDER, Row, column_indexes, decode_row, iter_records, read_header
+
+class LogFollower:
+    def __init__(self, filename: str, game: Game):
+        self.filename = filename
+        self.game = game
+        # highest `order` fed to `game`
+        self.highest_order = -1
+        # offset just past the last complete record read from an appended log
+        self.offset = 0
+        # whether the log is newest first, known once it has two rows
+        self.newest_first: Optional[bool] = None
+        self.supported = True
+        self.last_stat: Optional[Tuple[int, int]] = None
+
+    def poll(self) -> List[Hand]:
+        '''
+        Read whatever was added to the log since the last poll, returning the
+        hands completed by it: those before a hand that started in it
+        '''
+        complete: List[Hand] = []
+        for row in self.read_new_rows():
+            if not self.supported:
+                break
+            if self.highest_order < 0 and not self.game.isSupportedLog(at=row[AT]):
+                print("Unsupported log format: the PokerNow.club file format has changed since this log was generated")
+                self.supported = False
+                break
+            self.highest_order = int(row[ORDER])
+
+            finished = self.game.parse_line(msg=row[ENTRY], at=row[AT], order=row[ORDER])
+            if finished is not None:
+                complete.append(finished)
+        return complete
+
+    def finish(self) -> Optional[Hand]:
+        '''
+        Return the newest hand, held back by `poll`, once the log is no
+        longer followed
+        '''
+        hand, self.game.current_hand = self.game.current_hand, None
+        return hand
+
+    def read_new_rows(self) -> List[Row]:
+        '''
+        Return the rows added to the log since the last call, oldest first
+        '''
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return []
+        if (stat.st_size, stat.st_mtime_ns) == self.last_stat:
+            return []
+        self.last_stat = (stat.st_size, stat.st_mtime_ns)
+
+        with open(self.filename, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files cannot be mapped
+                return []
+            with mm:
+                header_end = mm.find(b'\n')
+                if header_end < 0:
+                    return []
+                columns = column_indexes(read_header(mm))
+                data_start = header_end + 1
+
+                if self.newest_first is None:
+                    # only complete records; the log may be partway through being appended to
+                    first_two = [decode_row(columns, record) for record, _ in islice(iter_records(mm, data_start, include_tail=False), 2)]
+                    if len(first_two) < 2:
+                        # nothing to tell which way round the log is yet
+                        return []
+                    self.newest_first = int(first_two[0][ORDER]) > int(first_two[1][ORDER])
+
+                rows: List[Row] = []
+                if self.newest_first:
+                    # exports are written whole, so the last record is complete
+                    for record, _ in iter_records(mm, data_start):
+                        row = decode_row(columns, record)
+                        if int(row[ORDER]) <= self.highest_order:
+                            break
+                        rows.append(row)
+                else:
+                    if len(mm) < self.offset:
+                        # replaced by a shorter log; read it again, dropping rows already seen
+                        self.offset = 0
+                    for record, end in iter_records(mm, max(self.offset, data_start), include_tail=False):
+                        row = decode_row(columns, record)
+                        if int(row[ORDER]) > self.highest_order:
+                            rows.append(row)
+                        self.offset = end
+
+        rows.sort(key=lambda row: int(row[ORDER]))
+        return rows
@@ -6,18 +6,37 @@ Adapted to Python by Ben Kushigian on 8/7/2021
 Copyright © 2020 Say Goodnight Software. All rights reserved.
 '''
 
-from typing import List, Optional, Dict
-from util import nil_guard, first, last, hash_str_as_id
+from typing import Iterable, Iterator, List, Optional, Dict, Tuple, Union
+from util import nil_guard, first, hash_str_as_id, parse_timestamp
 from datetime import datetime, timezone
+from itertools import chain
+import sys
 
 from player import Player
-from hand import Hand
-from card import EmojiCard
+from hand import Hand, chips_as_dollars
+from card import cards_text
+from event import EventKind
+from classifier import classify, parse_dealer_id, parse_seats
 from seat import Seat
+from reader import AT, ENTRY, Row, as_row
+
+# Bump whenever a change to parsing changes the hands parsed from a log, so
+# that hands cached by an older version are parsed again
+PARSER_VERSION = 4
+
+def hand_id(dealer_id: Optional[str], date: Optional[datetime]) -> int:
+    '''
+    The id of the hand dealt by `dealer_id` (`None` for a dead button) at
+    `date`, from the dealer and the time the hand started
+    '''
+    timestamp = date.timestamp() if date else 0
+    if dealer_id is None:
+        return hash_str_as_id(f"deadbutton-{timestamp}")
+    return hash_str_as_id(f"{dealer_id}-{timestamp}")
 
 class Game:
 
-    def __init__(self, rows: List[Dict[str, str]],
+    def __init__(self, rows: Optional[List[Union[Row, Dict[str, str]]]] = None,
                        debug_hand_action=False,
                        name_map: Dict[str,str]=None,
                        num_seats=10,
@@ -28,166 +47,255 @@ class Game:
         self.hands: List[Hand] = []
         self.current_hand: Optional[Hand] = None
         self.name_map = name_map or {}
-        self.chip_formatter = chip_formatter or (lambda amt: f"${amt:0.2f}")
+        self.chip_formatter = chip_formatter or chips_as_dollars
 
         self.dealer_id: Optional[str] = None
+        # (id, name) -> the one Player this game uses for them
+        self.players: Dict[Tuple[str, str], Player] = {}
         self.num_seats = num_seats
-        self.init(rows)
-
-    def init(self, rows: List[Dict[str,str]]):
-        # super.init()
-
-        last_row = last(rows)
-        at = last_row["at"] if last_row else None
-        if self.isSupportedLog(at=at):
-            for row in rows[::-1]:
-                self.parse_line(msg=row["entry"], at=row["at"], order=row["order"])
-        else:
-            print("Unsupported log format: the PokerNow.club file format has changed since this log was generated")
+        if rows is not None:
+            self.init(rows)
+
+    def init(self, rows: List[Union[Row, Dict[str, str]]]):
+        '''
+        Parse `rows`, which may also be `csv.DictReader` rows, given in
+        PokerNow's export order (newest first)
+        '''
+        self.parse_rows(as_row(row) for row in reversed(rows))
+
+    def parse_rows(self, rows: Iterable[Row]):
+        '''
+        Parse `rows` oldest first and keep every hand in `self.hands`
+        '''
+        self.hands.extend(self.iter_hands(rows))
+
+    def iter_hands(self, rows: Iterable[Row]) -> Iterator[Hand]:
+        '''
+        Parse `rows` oldest first, one row at a time, yielding each `Hand` once it
+        is complete: that is, when the next hand starts (lines such as post-hand
+        shows are logged after `-- ending hand`) or when `rows` is exhausted.
+        `rows` may be any iterable, such as `reader.iter_rows_oldest_first`, so
+        neither the log nor the parsed hands need to be held in memory.
+        '''
+        rows = iter(rows)
+        first_row = next(rows, None)
+        at = first_row[AT] if first_row else None
+        if not self.isSupportedLog(at=at):
+            if self.show_errors:
+                print("Unsupported log format: the PokerNow.club file format has changed since this log was generated")
+            return
+
+        parse_line = self.parse_line
+        for msg, at, order in chain([first_row], rows):
+            hand = parse_line(msg, at, order)
+            if hand:
+                yield hand
+
+        if self.current_hand:
+            hand, self.current_hand = self.current_hand, None
+            yield hand
+
+    def iter_complete_hands(self, rows: Iterable[Row]) -> Iterator[Hand]:
+        '''
+        Like `iter_hands`, except that the last hand is held back, since a log
+        that is still being written may have more of it to come: cards can be
+        shown even after `-- ending hand`, so a hand is only complete once
+        the next one starts
+        '''
+        newest: Optional[Hand] = None
+        for hand in self.iter_hands(rows):
+            if newest is not None:
+                yield newest
+            newest = hand
+
+    def load_hands(self, hands: Iterable[Hand]):
+        '''
+        Take over `hands` parsed by another `Game`, such as hands loaded from a
+        `cache.GameCache`, applying this game's name map, seats and chip
+        formatter to them. `hands` must have been parsed without a name map.
+        '''
+        def mapped(player: Player) -> Player:
+            return self.player(player.id, self.name_map.get(player.name, player.name))
+
+        for hand in hands:
+            if self.name_map:
+                hand.map_players(mapped)
+            hand.name_map = self.name_map
+            hand.num_seats = self.num_seats
+            hand.chip_formatter = self.chip_formatter
+            self.hands.append(hand)
+
+    def iter_hand_chunks(self, rows: Iterable[Row], hands_per_chunk: int = 1) -> Iterator[Tuple[Optional[str], List[Row]]]:
+        '''
+        Split `rows` (oldest first) at `-- starting hand` lines into chunks of up
+        to `hands_per_chunk` hands without parsing them. Each chunk comes with the
+        dealer id carried into its first hand, which dead button hands rely on, so
+        that a fresh `Game` with that `dealer_id` parses the chunk exactly as this
+        one would have. Rows before the first hand are dropped, as in `parse_line`.
+        '''
+        rows = iter(rows)
+        first_row = next(rows, None)
+        at = first_row[AT] if first_row else None
+        if not self.isSupportedLog(at=at):
+            if self.show_errors:
+                print("Unsupported log format: the PokerNow.club file format has changed since this log was generated")
+            return
+
+        chunk: List[Row] = []
+        chunk_dealer_id = self.dealer_id
+        hands_in_chunk = 0
+        for row in chain([first_row], rows):
+            msg = row[ENTRY]
+            if msg and msg.startswith("-- starting hand "):
+                if hands_in_chunk == hands_per_chunk:
+                    yield chunk_dealer_id, chunk
+                    chunk, hands_in_chunk = [], 0
+                    chunk_dealer_id = self.dealer_id
+                if "dead button" not in msg:
+                    self.dealer_id = parse_dealer_id(msg)
+                hands_in_chunk += 1
+            if hands_in_chunk:
+                chunk.append(row)
+        if chunk:
+            yield chunk_dealer_id, chunk
         
-    def isSupportedLog(self, at: str) -> bool:
-        format_str = "%Y-%m-%dT%H:%M:%S.%f%z"   # from Swift format string "yyyy-MM-dd'T'HH:mm:ss.SSSZ"
+    def player(self, id: str, name: str) -> Player:
+        '''
+        Return the `Player` for PokerNow id `id` playing as `name`, creating it the
+        first time they are seen. Every hand shares it, rather than holding its
+        own copy of the player and their id and name strings. Players who change
+        their name get a new `Player`, so hands already parsed keep the old one.
+        '''
+        key = (id, name)
+        player = self.players.get(key)
+        if player is None:
+            player = Player(admin=False, id=sys.intern(id), name=sys.intern(name))
+            self.players[key] = player
+        return player
 
+    def isSupportedLog(self, at: str) -> bool:
         try:
-            date = datetime.strptime(nil_guard(at, ""), format_str)
+            date = parse_timestamp(nil_guard(at, ""))
         except Exception as e:
-            print(e)
+            if self.show_errors:
+                print(e)
             raise RuntimeError("Cannot parse log's date")
             
         oldestSupportedLog = datetime.fromtimestamp(1594731595, tz=timezone.utc)
         
         return date > oldestSupportedLog
     
-    def parse_line(self, msg: Optional[str], at: Optional[str], order: Optional[str]):
-        format_str = "%Y-%m-%dT%H:%M:%S.%f%z"   # from Swift format string "yyyy-MM-dd'T'HH:mm:ss.SSSZ"
-        date = datetime.strptime(at, format_str) if at else datetime.strptime("")
-        hand_number = -1
+    def parse_line(self, msg: Optional[str], at: Optional[str], order: Optional[str]) -> Optional[Hand]:
+        '''
+        Parse a single log line, returning the hand it completed (if any)
+        '''
+        finished_hand: Optional[Hand] = None
+        event = classify(msg)
+        kind = event and event.kind
         
-        if msg and msg.startswith("-- starting hand "):
+        if kind == EventKind.start:
             # -- starting hand #1  (No Limit Texas Hold'em) (dealer: ""Superman @ lcLCU4HVrS"") --
             #
-            # This contains hand number, game type, and current dealer
-            starting_hand_components = msg.split(' (dealer: "')
-            hand_number = starting_hand_components[0].split("#")[1].split()[0]
-            unparsed_dealer = last(starting_hand_components).replace('") --', "")
-            
-            # for legacy logs
-            dealer_separator = " @ "
-            if unparsed_dealer and " # " in unparsed_dealer:
-                dealer_separator = " # "
-
+            # This contains hand number, game type, and current dealer.
+            # Only these rows need their timestamp, so it is decoded here.
+            date = parse_timestamp(at)
             hand = Hand(name_map=self.name_map, num_seats=self.num_seats, chip_formatter=self.chip_formatter)
-            if "dead button" in msg:
-                hand.id = hash_str_as_id(f"deadbutton-{date.timestamp() if date else 0}")
+            if event.player_id is None:
+                # dead button
                 hand.dealer = None
             else:
-                dealer_name_ids = unparsed_dealer and unparsed_dealer.split(dealer_separator)
-                self.dealer_id = dealer_name_ids and last(dealer_name_ids)
-                hand.id = hash_str_as_id(f"{nil_guard(self.dealer_id, 'error')}-{date.timestamp() if date else 0}")
-                
-            hand.pn_hand_number = hand_number
+                self.dealer_id = event.player_id
+            hand.id = hand_id(event.player_id, date)
+
+            hand.pn_hand_number = event.info
             hand.date = date
+            # Players may still show their cards after `-- ending hand`, so a
+            # hand is only complete once the next one starts
+            finished_hand = self.current_hand
             self.current_hand = hand
-            self.hands.append(hand)
-        elif msg and msg.startswith("-- ending hand "):
+        elif kind == EventKind.end:
             if self.debug_hand_action:
                 print("----")
-        elif msg and msg.startswith("Player stacks"):
+        elif kind == EventKind.stacks:
             # Player stacks: #1 ""Superman @ lcLCU4HVrS"" (10000) | #2 ""LexLuthor @ 7ZOX07XXIG"" (28991)
             # 
             # 1. Players in this hand
             # 2. Each player's stack size
             # 3. Each player's seat number
+            hand = self.current_hand
+            if not hand:
+                raise RuntimeError("Game doesn't have a current_hand")
 
-            players_with_stacks = msg.replace("Player stacks: ", "").split(" | ")
             players : List[Player] = []
-            
-            for player_with_stack in players_with_stacks:
-                seat_number = first(player_with_stack.split(" "))
-                if not seat_number:
-                    raise RuntimeError(f"Illegal seat_number {seat_number} in hand #{hand_number}")
-                if seat_number:
-                    player_with_stack_no_seat = player_with_stack.replace(f"{seat_number} ", "")
-                seat_number_int = int(seat_number.replace("#", "") if seat_number is not None else "0")
-                
-                name_ids = first(player_with_stack_no_seat.split('\" '))
-                name_ids = name_ids and name_ids.replace('"', "").split(" @ ")
-                name = name_ids[0]
+            for seat_number, name, pid, stack in parse_seats(msg):
                 name = self.name_map.get(name, name)
-                if name is None:
-                    raise RuntimeError(f"Illegal State: expected player name but found None: hand #{hand_number}")
-                pid = name_ids[1]
-                stack_size = player_with_stack.split('" (')[-1].replace(")", "")
-                if not stack_size:
-                    stack_size = "0"
-                
-                player = Player(admin=False, id=pid, stack=float(stack_size), name=name)
+                player = self.player(pid, name)
                 players.append(player)
-                
-                if not self.current_hand:
-                    raise RuntimeError(f"Game doesn't have a current_hand (hand #{hand_number})")
-                self.current_hand.seats.append(Seat(player=player, summary=f"{player.name} didn't show and lost", pre_flop_bet=False, number=seat_number_int))
+                hand.seat_player(player, Seat(player=player, summary=f"{player.name} didn't show and lost", pre_flop_bet=False, stack=stack, number=seat_number))
                         
-            self.current_hand.players = players
+            hand.players = players
             dealer = first([x for x in players if x.id == self.dealer_id])
             if dealer:
-                self.current_hand.dealer = dealer
-        elif msg and msg.startswith("Your hand is "):
+                hand.dealer = dealer
+        elif kind == EventKind.hole:
             # Your hand is Q♠, Q♥
             #
             # This line gives the hero's hand
-            self.current_hand.hole = [EmojiCard(c.strip()) for c in  msg.replace("Your hand is ", "").split(", ")]
+            self.current_hand.hole = list(event.cards)
 
             if self.debug_hand_action:
-                print(f"#{nil_guard(self.current_hand.id, 0)} - hole cards: {[c.value for c in nil_guard(self.current_hand.hole, [])]}")
-        elif msg and msg.startswith("flop"):
-            line = slice(msg, start='[',  end=']')
-            flop = line and [EmojiCard(c).emojiFlip() for c in line.replace("flop: ", "").split(", ")]
-            self.current_hand.flop = flop or []
-            
-            if self.debug_hand_action:
-                print(f"#{nil_guard(self.current_hand.id, 0)} - flop: {[c.value for c in (self.current_hand.flop or [])]}")
-
-        elif msg and msg.startswith("turn"):
-            line = slice(msg, "[", "]")
-            self.current_hand.turn = EmojiCard(line.replace("turn: ", "")).emojiFlip()
-
-            if self.debug_hand_action:
-                # TODO: format
-                print(f"#{nil_guard(self.current_hand and self.current_hand.id,  0)} - turn: {nil_guard(self.current_hand and self.current_hand.turn.value, '?')}")
-
-        elif msg and msg.startswith("river"):
-            line = slice(msg, '[', ']')
-            self.current_hand.river = EmojiCard(line.replace("river: ", "")).emojiFlip
+                print(f"#{nil_guard(self.current_hand.id, 0)} - hole cards: {cards_text(self.current_hand.hole)}")
+        elif kind == EventKind.board:
+            # Flop:  [6♦, 9♥, 8♣]
+            # Turn: 6♦, 9♥, 8♣ [A♠]
+            # River (second run): 6♦, 9♥, 8♣, A♠ [2♠]
+            hand = self.current_hand
+            if event.street == "flop":
+                if event.second_run:
+                    hand.second_flop = list(event.cards)
+                else:
+                    hand.flop = list(event.cards)
+            elif event.street == "turn":
+                if event.second_run:
+                    hand.second_turn = event.cards[0]
+                else:
+                    hand.turn = event.cards[0]
+            else:
+                if event.second_run:
+                    hand.second_river = event.cards[0]
+                else:
+                    hand.river = event.cards[0]
 
             if self.debug_hand_action:
-                # TODO: format
-                print("#\(self.currentHand?.id ?? 0) - river: \(self.currentHand?.river?.rawValue ?? '?')")
+                print(f"#{nil_guard(hand.id, 0)} - {event.street}: {cards_text(event.cards)}")
 
-        else:
-            name_ids = msg and first(msg.split('" ')).split(" @ ")
-            player = first([p for p in self.current_hand.players if p.id == last(name_ids)]) if self.current_hand else None
+        elif kind == EventKind.run_it_twice:
+            if self.current_hand:
+                self.current_hand.ran_it_twice = True
+        elif kind == EventKind.post:
+            # "Superman @ lcLCU4HVrS" posts a big blind of 20.00
+            player = self.current_hand.players_by_id.get(event.player_id) if self.current_hand else None
             if player:
-                if msg and "big blind" in msg:
-                    bigBlindSize = float(nil_guard(last(msg.split("big blind of ")), 0.0))
-                    self.current_hand.big_blind_size = bigBlindSize
+                if "big blind" in event.info:
+                    self.current_hand.big_blind_size = event.amount
                     self.current_hand.big_blind.append(player)
 
                     if self.debug_hand_action:
-                        # TODO: format
-                        print("#\(self.currentHand?.id ?? 0) - \(player.name ?? 'Unknown Player') posts big \(bigBlindSize)  (Pot: \(self.currentHand?.pot ?? 0))")
-
-                if msg and "small blind" in msg:
-                    if "and go all in" in msg:
-                        msg = msg.split('and go all in')[0]
-                    small_blind_size = float(nil_guard(msg.split("small blind of ")[-1], 0.0))
-                    self.current_hand.small_blind_size = small_blind_size
-                    if "missing" in msg:
+                        print(f"#{nil_guard(self.current_hand.id, 0)} - {player.name or 'Unknown Player'} posts big {event.amount}")
+
+                if "small blind" in event.info:
+                    self.current_hand.small_blind_size = event.amount
+                    if "missing" in event.info:
                         self.current_hand.missing_small_blinds.append(player)
                     else:
                         self.current_hand.small_blind = player
                     
                     if self.debug_hand_action:
-                        print("#\(self.currentHand?.id ?? 0) - \(player.name ?? 'Unknown Player') posts small \(smallBlindSize)  (Pot: \(self.currentHand?.pot ?? 0))")
+                        print(f"#{nil_guard(self.current_hand.id, 0)} - {player.name or 'Unknown Player'} posts small {event.amount}")
+
         if self.current_hand:
             self.current_hand.lines.append(nil_guard(msg, "unknown line"))
+            self.current_hand.order = order
+            if event:
+                self.current_hand.events.append(event)
+        return finished_hand
@@ -0,0 +1,266 @@
+'''
+inbox.py
+
+Converts each log put in a directory, for `pn2ps --inbox`. Several daemons may
+share an inbox: a log is claimed by renaming it into the daemon's own directory
+under the inbox's `processing` directory, which only one of them can do. Once
+converted, the log and its output move to the outbox, or to the error
+directory along with an `.error.txt` saying why it couldn't be converted.
+A zip archive of logs is claimed and moved as one, failing if any of its logs
+does.
+
+A daemon that dies leaves its claimed logs in `processing/<host>-<pid>`. They
+are handed back to the inbox by the next daemon started on the same host.
+If a worker process dies, e.g., killed for running out of memory, the pool is
+started again, and the logs it took down are converted again. A log that
+takes down the pool `MAX_ATTEMPTS` times is taken to be the cause and fails.
+'''
+
+import os
+import socket
+import time
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from batch import describe_error
+from reader import ARCHIVE_SUFFIX, is_log_name, list_logs, log_base, log_size
+
+# times a log is converted in pools that break before it fails
+MAX_ATTEMPTS = 3
+
+class Claim(NamedTuple):
+    log: str
+    # the log's size decompressed
+    size: int
+    # the executor converting it
+    executor: Executor
+
+def is_inbox_name(filename: str) -> bool:
+    '''
+    Whether `filename` is named like a log or an archive of them
+    '''
+    return is_log_name(filename) or filename.lower().endswith(ARCHIVE_SUFFIX)
+
+def convert_logs_in(convert_log: Callable[[str], int], filename: str) -> int:
+    '''
+    Convert each log in `filename`, returning the number of hands converted
+    '''
+    return sum(convert_log(log) for log in list_logs(filename))
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class Inbox:
+    '''
+    The inbox `directory`. Logs are converted by calling `convert_log`, which
+    returns the number of hands it converted, on them in an executor from
+    `make_executor`, at most `jobs` at a time. `outputs_for` gives the files
+    `convert_log` writes for a log, which move along with it.
+    '''
+    def __init__(self, directory: str, convert_log: Callable[[str], int], outputs_for: Callable[[str], List[str]],
+                 make_executor: Callable[[], Executor], outbox: Optional[str] = None, error_dir: Optional[str] = None,
+                 jobs: int = 1, memory_budget: int = 0):
+        self.directory = directory
+        self.convert_log = convert_log
+        self.outputs_for = outputs_for
+        self.make_executor = make_executor
+        self.claims_dir = os.path.join(directory, "processing")
+        self.processing = os.path.join(self.claims_dir, f"{socket.gethostname()}-{os.getpid()}")
+        self.outbox = outbox or os.path.join(directory, "done")
+        self.error_dir = error_dir or os.path.join(directory, "failed")
+        self.jobs = jobs
+        # only start another log while those being converted total less than
+        # this many bytes, decompressed, if not 0
+        self.memory_budget = memory_budget
+        for path in (self.processing, self.outbox, self.error_dir):
+            os.makedirs(path, exist_ok=True)
+
+        # name -> size at the last poll; logs are only claimed once their size
+        # stops changing, so that we don't claim one that is still being copied
+        self.sizes: Dict[str, int] = {}
+        # (name, size) -> the log's size decompressed, counted once per log
+        self.decompressed_sizes: Dict[Tuple[str, int], int] = {}
+        self.running: Dict[Future, Claim] = {}
+        # claimed log -> times it was converted in a pool that broke
+        self.attempts: Dict[str, int] = {}
+        self.executor = make_executor()
+
+    def run(self, poll_interval: float):
+        '''
+        Convert logs as they are put in the inbox until interrupted, then
+        finish those being converted
+        '''
+        self.recover()
+        try:
+            while True:
+                self.poll()
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            print("Finishing the logs being converted")
+            self.stop()
+
+    def recover(self):
+        '''
+        Hand the logs claimed by daemons on this host that are no longer
+        running back to the inbox
+        '''
+        host = socket.gethostname()
+        for name in sorted(os.listdir(self.claims_dir)):
+            path = os.path.join(self.claims_dir, name)
+            claimer, _, pid = name.rpartition('-')
+            if not os.path.isdir(path) or claimer != host or not pid.isdigit() or process_alive(int(pid)):
+                continue
+            for log in sorted(os.listdir(path)):
+                if is_inbox_name(log):
+                    os.replace(os.path.join(path, log), os.path.join(self.directory, log))
+                    print(f"Recovered {log} from a stopped daemon")
+                else:
+                    # partial output
+                    os.remove(os.path.join(path, log))
+            os.rmdir(path)
+
+    def poll(self):
+        '''
+        Move the logs converted since the last poll out of `processing`, and
+        claim and start converting logs whose size hasn't changed since it
+        '''
+        for future in [f for f in self.running if f.done()]:
+            claim = self.running.pop(future)
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self.retry(claim, future)
+            else:
+                self.finish(claim.log, future)
+
+        in_flight = sum(claim.size for claim in self.running.values())
+        for name in sorted(os.listdir(self.directory)):
+            if len(self.running) >= self.jobs:
+                break
+            path = os.path.join(self.directory, name)
+            if not is_inbox_name(name) or not os.path.isfile(path):
+                continue
+            try:
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                continue
+            if self.sizes.get(name) != size:
+                self.sizes[name] = size
+                continue
+            if self.memory_budget:
+                # a compressed log is decompressed into memory whole
+                if (name, size) not in self.decompressed_sizes:
+                    try:
+                        self.decompressed_sizes[(name, size)] = sum(log_size(log) for log in list_logs(path))
+                    except Exception:
+                        # e.g., a corrupt archive; converting it will say so
+                        self.decompressed_sizes[(name, size)] = size
+                size = self.decompressed_sizes[(name, size)]
+                # always allow one log, however large, so that none is stuck
+                if self.running and in_flight + size > self.memory_budget:
+                    break
+
+            claimed = os.path.join(self.processing, name)
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                # claimed by another daemon
+                continue
+            self.decompressed_sizes.pop((name, self.sizes.pop(name)), None)
+            self.submit(claimed, size)
+            in_flight += size
+
+    def submit(self, claimed: str, size: int):
+        try:
+            future = self.executor.submit(convert_logs_in, self.convert_log, claimed)
+        except BrokenProcessPool:
+            # the logs it was converting are retried as their futures are seen
+            self.restart()
+            future = self.executor.submit(convert_logs_in, self.convert_log, claimed)
+        self.running[future] = Claim(claimed, size, self.executor)
+
+    def restart(self):
+        '''
+        Replace a pool that broke when one of its workers died
+        '''
+        print("A worker process died; starting the pool again")
+        self.executor.shutdown(wait=False)
+        self.executor = self.make_executor()
+
+    def retry(self, claim: Claim, future: Future):
+        '''
+        Convert a log again that was taken down by its pool breaking, unless
+        it has been too often
+        '''
+        if claim.executor is self.executor:
+            self.restart()
+        attempts = self.attempts.get(claim.log, 0) + 1
+        if attempts >= MAX_ATTEMPTS:
+            self.attempts.pop(claim.log, None)
+            self.finish(claim.log, future)
+            return
+        self.attempts[claim.log] = attempts
+        self.submit(claim.log, claim.size)
+
+    def stop(self):
+        '''
+        Shut the executor down, finishing the logs it has started and handing
+        those it hasn't, or that a broken pool took down, back to the inbox
+        for next time
+        '''
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for future, claim in self.running.items():
+            if future.cancelled() or isinstance(future.exception(), BrokenProcessPool):
+                for path in self.outputs(claim.log):
+                    if os.path.exists(path):
+                        os.remove(path)
+                os.replace(claim.log, os.path.join(self.directory, os.path.basename(claim.log)))
+            else:
+                self.finish(claim.log, future)
+        self.running = {}
+        try:
+            os.rmdir(self.processing)
+        except OSError:
+            pass
+
+    def outputs(self, claimed: str) -> List[str]:
+        '''
+        The files written converting `claimed`, or each log in it
+        '''
+        try:
+            logs = list_logs(claimed)
+        except Exception:
+            # a corrupt archive, so nothing was written
+            logs = []
+        return [path for log in logs for path in self.outputs_for(log)]
+
+    def finish(self, claimed: str, future: Future):
+        '''
+        Move a converted log, and its output, out of `processing`
+        '''
+        name = os.path.basename(claimed)
+        outputs = self.outputs(claimed)
+        self.attempts.pop(claimed, None)
+        try:
+            converted = future.result()
+            error = None if converted else "no hands found"
+        except Exception as e:
+            error = describe_error(e)
+
+        if error is None:
+            for path in [claimed] + outputs:
+                os.replace(path, os.path.join(self.outbox, os.path.basename(path)))
+            print(f"OK      {name} ({converted} hands)")
+        else:
+            for path in outputs:
+                if os.path.exists(path):
+                    os.remove(path)
+            os.replace(claimed, os.path.join(self.error_dir, name))
+            with open(os.path.join(self.error_dir, f"{log_base(name)}.error.txt"), 'w', encoding='utf-8') as f:
+                f.write(f"{error}\n")
+            print(f"FAILED  {name}: {error}")
@@ -0,0 +1,168 @@
+'''
+index.py
+
+A sidecar index of where each hand is in a PokerNow log, so that a few hands
+of a long log (`pn2ps --hands 4000-4100`, or `--from`/`--to` a time) can be
+converted by parsing just their rows.
+
+Logs are newest first, so a hand's rows run from just after the next hand's
+`-- starting hand` line down to its own. The index keeps that byte range for
+each hand along with its number, id and start time. It is stored next to the
+log as `<log>.pn2ps.idx` and built again whenever the log changes.
+'''
+
+import json
+import mmap
+import os
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from classifier import STARTING_HAND, parse_dealer_id
+from game import Game, hand_id
+from hand import Hand
+from reader import AT, ENTRY, column_indexes, decode_row, iter_buffer_rows_oldest_first, iter_records_reversed_at, log_base, mapped_log, read_header, split_archive_path
+from util import parse_timestamp
+
+# Bump whenever a change to the index changes what it holds for a log
+INDEX_VERSION = 1
+
+class HandSpan(NamedTuple):
+    number: Optional[str]
+    id: int
+    at: str
+    # the dealer carried into the hand, which dead button hands need
+    dealer_id: Optional[str]
+    # the hand's rows are `log[start:end]`
+    start: int
+    end: int
+
+def index_filename(filename: str) -> str:
+    return f'{log_base(filename)}.pn2ps.idx'
+
+def log_key(filename: str) -> Tuple[int, int, int]:
+    '''
+    `(index version, size, mtime)` of the file holding the log `filename`
+    '''
+    stat = os.stat(split_archive_path(filename)[0])
+    return INDEX_VERSION, stat.st_size, stat.st_mtime_ns
+
+def build_index(buf: Union[bytes, mmap.mmap]) -> List[HandSpan]:
+    '''
+    Index the hands of the log `buf`, oldest first. Only `-- starting hand`
+    records are decoded.
+    '''
+    header_end = buf.find(b'\n')
+    if header_end < 0:
+        return []
+    columns = column_indexes(read_header(buf))
+    data_start = header_end + 1
+
+    # (hand number, id, at, dealer carried in, offset just past the start line)
+    starts: List[Tuple[Optional[str], int, str, Optional[str], int]] = []
+    dealer_id: Optional[str] = None
+    for offset, record in iter_records_reversed_at(buf, data_start):
+        if b'-- starting hand ' not in record:
+            continue
+        row = decode_row(columns, record)
+        msg = row[ENTRY]
+        if not msg or not msg.startswith('-- starting hand '):
+            continue
+        carried = dealer_id
+        hand_dealer = None if "dead button" in msg else parse_dealer_id(msg)
+        if hand_dealer is not None:
+            dealer_id = hand_dealer
+        m = STARTING_HAND.match(msg)
+        starts.append((m and m.group('number'), hand_id(hand_dealer, parse_timestamp(row[AT])), row[AT], carried, offset + len(record)))
+
+    spans: List[HandSpan] = []
+    for i, (number, id, at, carried, end) in enumerate(starts):
+        start = starts[i + 1][4] if i + 1 < len(starts) else data_start
+        spans.append(HandSpan(number, id, at, carried, start, end))
+    return spans
+
+def load_index(filename: str) -> List[HandSpan]:
+    '''
+    Return the index of the log `filename`, building it and saving it next
+    to the log unless a saved one is up to date
+    '''
+    key = log_key(filename)
+    path = index_filename(filename)
+    try:
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        if tuple(saved["key"]) == key:
+            return [HandSpan(*span) for span in saved["hands"]]
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        pass
+
+    with mapped_log(filename) as buf:
+        spans = build_index(buf)
+    try:
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump({"key": key, "hands": spans}, f)
+        os.replace(f'{path}.tmp', path)
+    except OSError as e:
+        # e.g., a read-only log directory; the index is only a speed up
+        print(f"Could not save index {path}: {e}")
+    return spans
+
+def parse_datetime(value: str) -> datetime:
+    '''
+    Parse a `--from`/`--to` time such as `2021-08-09` or `2021-08-09T21:20`,
+    taken to be UTC unless it says otherwise
+    '''
+    date = datetime.fromisoformat(value)
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+def parse_hand_range(value: str) -> Tuple[Optional[int], Optional[int]]:
+    '''
+    Parse a `--hands` range: `4000-4100`, `4000`, `4000-` or `-4100`
+    '''
+    first, dash, last = value.partition('-')
+    first_number = int(first) if first.strip() else None
+    last_number = (int(last) if last.strip() else None) if dash else first_number
+    return first_number, last_number
+
+def hand_number(span: HandSpan) -> Optional[int]:
+    try:
+        return int(span.number)
+    except (TypeError, ValueError):
+        return None
+
+def select_hands(spans: List[HandSpan], first: Optional[int] = None, last: Optional[int] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[List[HandSpan]]:
+    '''
+    Return the hands numbered `first` to `last` and started from `since` up
+    to `until`, inclusive, as runs of hands that are next to each other in
+    the log
+    '''
+    runs: List[List[HandSpan]] = []
+    previous = -2
+    for i, span in enumerate(spans):
+        number = hand_number(span)
+        if first is not None and (number is None or number < first):
+            continue
+        if last is not None and (number is None or number > last):
+            continue
+        if since is not None or until is not None:
+            started = parse_timestamp(span.at)
+            if (since is not None and started < since) or (until is not None and started > until):
+                continue
+        if i == previous + 1:
+            runs[-1].append(span)
+        else:
+            runs.append([span])
+        previous = i
+    return runs
+
+def iter_selected_hands(filename: str, runs: List[List[HandSpan]], game_for: Callable[[], Game]) -> Iterator[Hand]:
+    '''
+    Parse just the hands in `runs` from the log `filename`, each run with a
+    fresh `Game` from `game_for()`
+    '''
+    with mapped_log(filename) as buf:
+        for run in runs:
+            game = game_for()
+            game.dealer_id = run[0].dealer_id
+            # the run's rows, from its newest hand's down to its oldest's
+            yield from game.iter_hands(iter_buffer_rows_oldest_first(buf, hand_lines_only=True, start=run[-1].start, end=run[0].end))
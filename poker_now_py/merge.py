@@ -0,0 +1,44 @@
+'''
+merge.py
+
+Merges the hands of several PokerNow logs into one history, such as a
+download taken mid-session and the final export of the same room, converting
+each hand they share only once.
+
+Each log is parsed on its own, so that a hand's rows only ever come from one
+log, and the logs' hands are merged as they stream in. Hands are merged on
+when they started, which within a room follows `order` and, unlike `order`,
+can be compared between rooms. A hand logged in more than one log has the
+same id in each, taken from its dealer and start time, so its copies meet in
+the merge; only one is kept, the one with the most of the hand, as a download
+can end partway through one.
+'''
+
+import heapq
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional
+
+from hand import Hand
+
+def start_time(hand: Hand) -> datetime:
+    return hand.date
+
+def merge_hands(logs: Iterable[Iterable[Hand]]) -> Iterator[Hand]:
+    '''
+    Merge the hands of `logs`, each oldest first, into one stream, oldest
+    first, leaving out hands already seen in another log. Only the ids of
+    hands started at the same time are held, as copies of a hand start at the
+    same time, so memory doesn't grow with the number of hands.
+    '''
+    # hand id -> the most complete copy of it, for hands started at `started`
+    seen: Dict[int, Hand] = {}
+    started: Optional[datetime] = None
+    for hand in heapq.merge(*logs, key=start_time):
+        if hand.date != started:
+            yield from seen.values()
+            seen = {}
+            started = hand.date
+        kept = seen.get(hand.id)
+        if kept is None or len(hand.events) > len(kept.events):
+            seen[hand.id] = hand
+    yield from seen.values()
@@ -0,0 +1,86 @@
+'''
+ordering.py
+
+Puts log rows in `order`, for logs that aren't exactly newest first, e.g.,
+downloads merged by hand or exports that interleave. `Game` has to see rows
+in the order they were logged, or hands come out garbled.
+
+Rows are sorted in memory while they fit within a budget. Beyond that, each
+budget's worth is sorted and spilled to a temporary file, and the sorted runs
+are merged back, so memory stays bounded however large the log.
+'''
+
+import heapq
+import pickle
+import tempfile
+from typing import IO, Iterable, Iterator, List, Optional
+
+from reader import ENTRY, ORDER, Row
+
+# sort in memory up to this many bytes of rows, roughly, before spilling
+SORT_MEMORY = 256 * 1024 * 1024
+
+# rough cost of a row in memory beyond its entry text: the tuple, the
+# timestamp and order strings and the list slot
+ROW_OVERHEAD = 250
+
+# rows pickled to a run at a time
+SPILL_BATCH = 4096
+
+def order_key(row: Row) -> int:
+    return int(row[ORDER])
+
+def spill(rows: List[Row], directory: Optional[str]) -> IO[bytes]:
+    '''
+    Sort `rows` and write them to a temporary file, which is deleted once closed
+    '''
+    rows.sort(key=order_key)
+    run = tempfile.TemporaryFile(dir=directory)
+    for i in range(0, len(rows), SPILL_BATCH):
+        pickle.dump(rows[i:i + SPILL_BATCH], run, protocol=pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+def read_run(run: IO[bytes]) -> Iterator[Row]:
+    while True:
+        try:
+            batch = pickle.load(run)
+        except EOFError:
+            return
+        yield from batch
+
+def sort_rows(rows: Iterable[Row], memory: int = SORT_MEMORY, directory: Optional[str] = None) -> Iterator[Row]:
+    '''
+    Yield `rows` in increasing `order`, leaving out repeats of a row, as
+    overlapping downloads merged together would have. Once `memory` bytes or so
+    of rows have been read, they are sorted into runs in temporary files in
+    `directory` (the system default if `None`) and merged.
+    '''
+    runs: List[IO[bytes]] = []
+    try:
+        buffered: List[Row] = []
+        size = 0
+        for row in rows:
+            buffered.append(row)
+            size += len(row[ENTRY] or "") + ROW_OVERHEAD
+            if size >= memory:
+                runs.append(spill(buffered, directory))
+                buffered, size = [], 0
+
+        if runs:
+            if buffered:
+                runs.append(spill(buffered, directory))
+            del buffered
+            ordered = heapq.merge(*(read_run(run) for run in runs), key=order_key)
+        else:
+            buffered.sort(key=order_key)
+            ordered = iter(buffered)
+
+        previous = None
+        for row in ordered:
+            if row != previous:
+                yield row
+            previous = row
+    finally:
+        for run in runs:
+            run.close()
@@ -9,10 +9,16 @@ Copyright © 2020 Say Goodnight Software. All rights reserved.
 from typing import Optional
 
 class Player:
-    def __init__(self, creator=False, admin=None, sitting=True, id=None, stack=0.0, name=None):
+    '''
+    A player's identity. `Game` shares one `Player` between all the hands a
+    player is in, so anything that changes from hand to hand, such as the
+    player's stack, belongs to their `Seat`.
+    '''
+    __slots__ = ('creator', 'admin', 'sitting', 'id', 'name')
+
+    def __init__(self, creator=False, admin=None, sitting=True, id=None, name=None):
         self.creator: bool = creator
         self.admin: Optional[bool] = admin
         self.sitting: bool = sitting
         self.id: Optional[str] = id
-        self.stack: float = stack
         self.name: Optional[str] = name
@@ -0,0 +1,339 @@
+'''
+reader.py
+
+Streaming readers for PokerNow.club csv logs.
+
+PokerNow exports logs newest-first, while `Game` needs to see rows oldest-first.
+Rather than loading the whole file and reversing it, these readers memory map
+the log and scan it backwards one record at a time.
+
+Logs may also be gzip, bz2 or xz compressed (`log.csv.gz`), or be members of a
+zip archive, named as if the archive were a directory (`logs.zip/log.csv`), as
+`zipimport` does. A compressed stream can't be read backwards, so these are
+decompressed into memory in one pass, without temporary files, and scanned
+backwards from there.
+'''
+
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import mmap
+import os
+import zipfile
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from classifier import HAND_LINE_STARTS, is_hand_line
+
+QUOTE = ord('"')
+
+# A row is the tuple `(entry, at, order)`, the only columns `Game` reads, in
+# those positions. Plain tuples are much cheaper to make than the dicts of
+# `csv.DictReader`, and are unpacked rather than looked up.
+Row = Tuple[Optional[str], Optional[str], Optional[str]]
+ENTRY, AT, ORDER = range(3)
+COLUMNS = ("entry", "at", "order")
+
+def as_row(row: Union[Row, Dict[str, str]]) -> Row:
+    '''
+    Return `row`, which may also be a `csv.DictReader` row, as a `Row`
+    '''
+    if isinstance(row, dict):
+        return (row.get("entry"), row.get("at"), row.get("order"))
+    return row
+
+# suffix -> function opening a file compressed that way
+DECOMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+ARCHIVE_SUFFIX = '.zip'
+
+def split_archive_path(filename: str) -> Tuple[str, Optional[str]]:
+    '''
+    Split `logs.zip/log.csv` into the archive and the member within it, or
+    return `(filename, None)` for a log that isn't in an archive
+    '''
+    lowered = filename.lower()
+    start = 0
+    while True:
+        i = lowered.find(ARCHIVE_SUFFIX, start)
+        if i < 0:
+            return filename, None
+        end = i + len(ARCHIVE_SUFFIX)
+        if end < len(filename) and filename[end] in ('/', os.sep) and os.path.isfile(filename[:end]):
+            return filename[:end], filename[end + 1:].replace(os.sep, '/')
+        start = end
+
+def is_compressed(filename: str) -> bool:
+    '''
+    Whether the log `filename` has to be decompressed to be read
+    '''
+    return split_archive_path(filename)[1] is not None or os.path.splitext(filename)[1].lower() in DECOMPRESSORS
+
+def is_log_name(filename: str) -> bool:
+    '''
+    Whether `filename` is named like a csv log, compressed or not
+    '''
+    base, ext = os.path.splitext(filename.lower())
+    if ext in DECOMPRESSORS:
+        ext = os.path.splitext(base)[1]
+    return ext == '.csv'
+
+def list_logs(filename: str) -> List[str]:
+    '''
+    Return the logs in `filename`: each csv in it if it's a zip archive, or
+    just `filename` otherwise
+    '''
+    if not filename.lower().endswith(ARCHIVE_SUFFIX):
+        return [filename]
+    with zipfile.ZipFile(filename) as archive:
+        # leaving out the resource forks macOS adds to archives
+        return [os.path.join(filename, name) for name in archive.namelist()
+                if is_log_name(name) and not name.startswith('__MACOSX/')]
+
+def log_base(filename: str) -> str:
+    '''
+    Path to name files made from the log `filename` after, without its
+    extensions: `log.csv.gz` -> `log`. Archive members are named after the
+    archive and the member, next to the archive: `logs.zip/may/log.csv` ->
+    `logs.may.log`.
+    '''
+    archive, member = split_archive_path(filename)
+    if member is not None:
+        return f"{os.path.splitext(archive)[0]}.{log_base(member).replace('/', '.')}"
+    base, ext = os.path.splitext(filename)
+    if ext.lower() in DECOMPRESSORS:
+        base = os.path.splitext(base)[0]
+    return base
+
+def open_log(filename: str) -> BinaryIO:
+    '''
+    Open the log `filename` to read its csv bytes, decompressing them as they
+    are read if need be
+    '''
+    archive, member = split_archive_path(filename)
+    if member is not None:
+        # the member stays readable after the archive is closed
+        with zipfile.ZipFile(archive) as zf:
+            f = zf.open(member)
+        opener = DECOMPRESSORS.get(os.path.splitext(member)[1].lower())
+        return opener(f, 'rb') if opener else f
+    opener = DECOMPRESSORS.get(os.path.splitext(filename)[1].lower())
+    return opener(filename, 'rb') if opener else open(filename, 'rb')
+
+# deflate's best compression ratio, which bounds a gzip log's size decompressed
+DEFLATE_MAX_RATIO = 1032
+
+def log_size(filename: str) -> int:
+    '''
+    How many bytes of csv the log `filename` holds once decompressed, which
+    is what `mapped_log` keeps in memory for a compressed log. Zip archives
+    record it for each member, and gzip in its last 4 bytes, modulo 4 GiB, so
+    that is only trusted for a log too small to hold 4 GiB. Other logs are
+    decompressed to count them.
+    '''
+    if not is_compressed(filename):
+        return os.path.getsize(filename)
+    archive, member = split_archive_path(filename)
+    if member is not None and os.path.splitext(member)[1].lower() not in DECOMPRESSORS:
+        with zipfile.ZipFile(archive) as zf:
+            return zf.getinfo(member).file_size
+    if member is None and filename.lower().endswith('.gz'):
+        compressed = os.path.getsize(filename)
+        if compressed * DEFLATE_MAX_RATIO < 1 << 32:
+            with open(filename, 'rb') as f:
+                f.seek(-4, os.SEEK_END)
+                return int.from_bytes(f.read(4), 'little')
+    size = 0
+    with open_log(filename) as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            size += len(block)
+    return size
+
+def read_header(mm: mmap.mmap) -> List[str]:
+    '''
+    Return the column names from the first line of a mapped csv file
+    '''
+    header_end = mm.find(b'\n')
+    if header_end < 0:
+        header_end = len(mm)
+    header = mm[:header_end].decode('utf-8-sig')
+    return next(csv.reader([header]), [])
+
+def iter_records_reversed(mm: mmap.mmap, start: int, end: Optional[int] = None) -> Iterator[bytes]:
+    '''
+    Yield the raw bytes of each csv record in `mm[start:end]`, last record first.
+
+    A record may span several physical lines when a quoted field contains a
+    newline. Every physical line that continues a record starts inside a quoted
+    field, so it holds an odd number of quote characters up to the end of the
+    record. Scanning backwards we therefore keep prepending lines until the
+    accumulated quote count is even, at which point the record is complete.
+    '''
+    for _, record in iter_records_reversed_at(mm, start, end):
+        yield record
+
+def iter_records_reversed_at(mm: mmap.mmap, start: int, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+    '''
+    Like `iter_records_reversed`, yielding each record with its offset in `mm`
+    '''
+    pos = len(mm) if end is None else end
+    record_end = pos
+    quotes = 0
+    while pos > start:
+        nl = mm.rfind(b'\n', start, pos)
+        line_start = nl + 1 if nl >= 0 else start
+        quotes += mm[line_start:pos].count(QUOTE)
+        pos = nl if nl >= 0 else start
+        if quotes % 2 == 0:
+            record = mm[line_start:record_end]
+            record_end = pos
+            quotes = 0
+            if record.strip():
+                yield line_start, record
+
+    # Unbalanced quotes at the top of the file: hand back what we have
+    record = mm[start:record_end]
+    if record_end > start and record.strip():
+        yield start, record
+
+def iter_records(mm: mmap.mmap, start: int, include_tail: bool = True) -> Iterator[Tuple[bytes, int]]:
+    '''
+    Yield the raw bytes of each csv record in `mm[start:]`, first record first,
+    along with the offset just past it. A record counts as complete once it
+    ends in a newline outside of quotes. Any incomplete record at the end,
+    e.g., one still being written, is yielded only if `include_tail` is true.
+    '''
+    pos = start
+    record_start = start
+    quotes = 0
+    while True:
+        nl = mm.find(b'\n', pos)
+        if nl < 0:
+            break
+        quotes += mm[pos:nl].count(QUOTE)
+        pos = nl + 1
+        if quotes % 2 == 0:
+            record = mm[record_start:pos]
+            record_start = pos
+            if record.strip():
+                yield record, pos
+    record = mm[record_start:]
+    if include_tail and record.strip():
+        yield record, len(mm)
+
+def column_indexes(header: List[str]) -> Tuple[int, int, int]:
+    '''
+    Return where the `entry`, `at` and `order` columns are in `header`
+    '''
+    try:
+        return tuple(header.index(column) for column in COLUMNS)
+    except ValueError:
+        raise ValueError(f"not a PokerNow log: expected columns {', '.join(COLUMNS)}, got {', '.join(header)}")
+
+def iter_decoded_rows(columns: Tuple[int, int, int], records: Iterable[bytes]) -> Iterator[Row]:
+    '''
+    Decode raw csv `records` into `Row`s, taking their fields from `columns`.
+    One csv reader decodes them all, rather than one per record.
+    '''
+    get = itemgetter(*columns)
+    for values in csv.reader(record.decode('utf-8') for record in records):
+        try:
+            yield get(values)
+        except IndexError:
+            # a short record; as csv.DictReader would, leave out what's missing
+            yield tuple(values[i] if i < len(values) else None for i in columns)
+
+def decode_row(columns: Tuple[int, int, int], record: bytes) -> Row:
+    '''
+    Decode one raw csv record into a `Row`
+    '''
+    return next(iter_decoded_rows(columns, [record]))
+
+def hand_record_starts(columns: Tuple[int, int, int]) -> Optional[Tuple[bytes, ...]]:
+    '''
+    How a raw record can start if its entry could be a hand line, or `None`
+    if that can't be told without decoding it, because `entry` isn't the
+    first column
+    '''
+    if columns[0] != 0:
+        return None
+    quoted = tuple(b'"' + start.replace('"', '""').encode('utf-8') for start in HAND_LINE_STARTS)
+    unquoted = tuple(start.encode('utf-8') for start in HAND_LINE_STARTS if '"' not in start)
+    return quoted + unquoted
+
+@contextmanager
+def mapped_log(filename: str) -> Iterator[Union[bytes, mmap.mmap]]:
+    '''
+    Give the csv bytes of the log `filename`: memory mapped, or decompressed
+    into memory if it's compressed
+    '''
+    if is_compressed(filename):
+        with open_log(filename) as f:
+            yield f.read()
+        return
+    with open(filename, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            mm = None
+        if mm is None:
+            yield b''
+            return
+        with mm:
+            yield mm
+
+def iter_rows_oldest_first(filename: str, hand_lines_only: bool = False) -> Iterator[Row]:
+    '''
+    Yield the rows of a PokerNow log, oldest row first. Only one record is
+    decoded at a time, so memory use does not grow with the size of the log,
+    unless it has to be decompressed first. With `hand_lines_only`, rows that
+    can't affect a hand (chat, seat requests, ...) are left out, mostly
+    without being decoded.
+    '''
+    with mapped_log(filename) as buf:
+        yield from iter_buffer_rows_oldest_first(buf, hand_lines_only)
+
+def iter_buffer_rows_oldest_first(buf: Union[bytes, mmap.mmap], hand_lines_only: bool = False,
+                                  start: Optional[int] = None, end: Optional[int] = None) -> Iterator[Row]:
+    '''
+    Like `iter_rows_oldest_first`, for a log that is already in memory, such
+    as an upload. Only the records in `buf[start:end]` are read if given,
+    which must not start or end partway through a record.
+    '''
+    header_end = buf.find(b'\n')
+    if header_end < 0:
+        return
+    columns = column_indexes(read_header(buf))
+    records = iter_records_reversed(buf, header_end + 1 if start is None else start, end)
+    starts = hand_record_starts(columns) if hand_lines_only else None
+    if starts is not None:
+        records = (record for record in records if record.startswith(starts))
+    rows = iter_decoded_rows(columns, records)
+    if hand_lines_only and starts is None:
+        rows = (row for row in rows if is_hand_line(row[ENTRY]))
+    yield from rows
+
+def rows_newer_than(filename: str, order: int, hand_lines_only: bool = False) -> List[Row]:
+    '''
+    Return the rows of a PokerNow log whose `order` is greater than `order`,
+    oldest first. Logs are newest first, so only the rows at the top of the
+    file, up to the first one that isn't newer, are read.
+    '''
+    rows: List[Row] = []
+    with io.TextIOWrapper(open_log(filename), encoding='utf-8-sig', newline='') as f:
+        records = csv.reader(f)
+        get = itemgetter(*column_indexes(next(records, [])))
+        for values in records:
+            if not values:
+                continue
+            row = get(values)
+            if int(row[ORDER]) <= order:
+                break
+            if hand_lines_only and not is_hand_line(row[ENTRY]):
+                continue
+            rows.append(row)
+    rows.reverse()
+    return rows
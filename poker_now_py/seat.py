@@ -10,6 +10,8 @@ from typing import Optional
 from player import Player
 
 class Seat:
+    __slots__ = ('player', 'summary', 'pre_flop_bet', 'showed_hand', 'stack', 'number')
+
     def __init__(self, player:Player=None,
                        summary:str='',
                        pre_flop_bet:bool = False,
@@ -0,0 +1,226 @@
+'''
+server.py
+
+A small HTTP service converting PokerNow.club logs, for tools that would
+otherwise run `pn2ps` once per log. Uses only the standard library.
+
+    POST /convert?hero=<name>&site=<pokerstars|swc>&multiplier=<x>&chip_formatter=<usd|raw>&namemap=<map>&tablename=<name>&seats=<n>
+
+The request body is the csv log, as exported by PokerNow. The response is the
+converted hand histories, each followed by a blank line as in `pn2ps`'s output
+files, streamed as they are rendered.
+
+Requests are read and answered on an asyncio event loop, while the logs are
+parsed and rendered in a process pool so that converting a large log doesn't
+hold up the others. Each log is split at its hands, using `index.build_index`,
+into chunks that the pool converts a few at a time, so that the first hands
+are sent while later ones are still being converted. Should a chunk fail
+after the response has started, the response is cut off without its final
+chunk, so that the client can tell it is incomplete.
+'''
+
+import asyncio
+from concurrent.futures import Executor
+from contextlib import closing
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from batch import HANDS_PER_CHUNK, submit_in_order
+from convert import SITES, iter_histories
+from game import Game
+from hand import CHIP_FORMATTERS
+from index import HandSpan, build_index
+from reader import iter_buffer_rows_oldest_first
+from util import parse_name_map
+
+# chunks of one log being converted at once
+CHUNKS_IN_FLIGHT = 4
+
+REASONS = {
+    100: "Continue",
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+}
+
+class ConvertOptions(NamedTuple):
+    hero: str
+    site: str = "pokerstars"
+    multiplier: float = 1.0
+    table_name: str = "DGen"
+    chip_formatter: str = "usd"
+    name_map: Optional[Dict[str, str]] = None
+    seats: int = 10
+
+class BadRequest(Exception):
+    '''
+    A request the server can't handle, answered with HTTP status `status`
+    '''
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def parse_options(query: str) -> ConvertOptions:
+    '''
+    Read the conversion options from a request's query string, raising
+    `BadRequest` if they're missing or invalid
+    '''
+    params = {name: values[-1] for name, values in parse_qs(query, keep_blank_values=True).items()}
+    hero = params.get("hero")
+    if not hero:
+        raise BadRequest(400, "hero is required")
+    site = params.get("site", "pokerstars").lower().strip()
+    if site not in SITES:
+        raise BadRequest(400, f"unknown site: {site}")
+    chip_formatter = params.get("chip_formatter", "usd").lower().strip()
+    if chip_formatter not in CHIP_FORMATTERS:
+        raise BadRequest(400, f"unknown chip formatter: {chip_formatter}")
+    try:
+        multiplier = float(params.get("multiplier", 1.0))
+        seats = int(params.get("seats", 10))
+        name_map = parse_name_map(params.get("namemap", "")) or None
+    except ValueError as e:
+        raise BadRequest(400, str(e))
+    return ConvertOptions(hero=hero, site=site, multiplier=multiplier or 1.0,
+                          table_name=params.get("tablename") or "DGen",
+                          chip_formatter=chip_formatter, name_map=name_map, seats=seats)
+
+def iter_upload_chunks(data: bytes, spans: List[HandSpan]) -> Iterator[Tuple[Optional[str], bytes]]:
+    '''
+    Split the csv log `data`, whose hands are `spans`, into logs of up to
+    `HANDS_PER_CHUNK` hands each, oldest first. Each comes with the dealer
+    carried into its first hand, which dead button hands need.
+    '''
+    header = data[:data.find(b'\n') + 1]
+    for i in range(0, len(spans), HANDS_PER_CHUNK):
+        run = spans[i:i + HANDS_PER_CHUNK]
+        # the newest hand's rows come first in the log
+        yield run[0].dealer_id, header + data[run[-1].start:run[0].end]
+
+def convert_chunk(chunk: bytes, dealer_id: Optional[str], options: ConvertOptions) -> List[str]:
+    '''
+    Convert a chunk from `iter_upload_chunks`, returning one rendered hand per
+    hand that could be rendered. Runs in a worker process.
+    '''
+    def report(hand, e):
+        print(f"Error parsing hand #{hand.pn_hand_number}...continuing")
+
+    game = Game(name_map=options.name_map, num_seats=options.seats, chip_formatter=CHIP_FORMATTERS[options.chip_formatter])
+    game.show_errors = False
+    game.dealer_id = dealer_id
+    hands = game.iter_hands(iter_buffer_rows_oldest_first(chunk, hand_lines_only=True))
+    return list(iter_histories(hands, options.site, hero_name=options.hero, multiplier=options.multiplier,
+                               table_name=options.table_name, on_error=report))
+
+def convert_upload(data: bytes, options: ConvertOptions) -> List[str]:
+    '''
+    Convert the whole csv log `data` in this process, as the server does
+    chunk by chunk
+    '''
+    return [descr for dealer_id, chunk in iter_upload_chunks(data, build_index(data))
+            for descr in convert_chunk(chunk, dealer_id, options)]
+
+class ConversionServer:
+    def __init__(self, executor: Executor, max_upload: int):
+        self.executor = executor
+        self.max_upload = max_upload
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''
+        Answer a single request on a connection, then close it
+        '''
+        try:
+            try:
+                data, spans, options = await self.read_request(reader, writer)
+            except BadRequest as e:
+                await self.respond(writer, e.status, f"{e}\n".encode())
+                return
+            writer.write(b"HTTP/1.1 200 OK\r\n"
+                         b"Content-Type: text/plain; charset=utf-8\r\n"
+                         b"Transfer-Encoding: chunked\r\n"
+                         b"Connection: close\r\n\r\n")
+            chunks = ((chunk, dealer_id, options) for dealer_id, chunk in iter_upload_chunks(data, spans))
+            with closing(submit_in_order(self.executor, convert_chunk, chunks, CHUNKS_IN_FLIGHT)) as futures:
+                for future in futures:
+                    await self.write_descrs(writer, await asyncio.wrap_future(future))
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            # too late to change the status; cutting the response off says it failed
+            print(f"Could not convert log: {e}")
+        finally:
+            writer.close()
+
+    async def write_descrs(self, writer: asyncio.StreamWriter, descrs: List[str]):
+        for descr in descrs:
+            body = f"{descr}\n\n".encode()
+            writer.write(f"{len(body):x}\r\n".encode() + body + b"\r\n")
+        # let a slow client hold up only its own response
+        await writer.drain()
+
+    async def read_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Tuple[bytes, List[HandSpan], ConvertOptions]:
+        '''
+        Read a request, returning the log in its body, where its hands are in
+        it and the conversion options
+        '''
+        try:
+            request_line = (await reader.readline()).decode('latin-1')
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise BadRequest(400, "malformed request line")
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        url = urlsplit(target)
+        if url.path != "/convert":
+            raise BadRequest(404, f"no such path: {url.path}")
+        if method != "POST":
+            raise BadRequest(405, "only POST is supported")
+        options = parse_options(url.query)
+        if "content-length" not in headers:
+            raise BadRequest(411, "Content-Length is required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise BadRequest(400, "bad Content-Length")
+        if length > self.max_upload:
+            raise BadRequest(413, f"logs are limited to {self.max_upload} bytes")
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        data = await reader.readexactly(length)
+
+        try:
+            # only its `-- starting hand` lines are decoded, but keep the loop free
+            spans = await asyncio.get_running_loop().run_in_executor(None, build_index, data)
+        except Exception as e:
+            raise BadRequest(422, f"could not convert log: {e}")
+        return data, spans, options
+
+    async def respond(self, writer: asyncio.StreamWriter, status: int, body: bytes):
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                     f"Content-Type: text/plain; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+async def serve(host: str, port: int, executor: Executor, max_upload: int):
+    '''
+    Serve conversions on `host:port` until cancelled
+    '''
+    server = await asyncio.start_server(ConversionServer(executor, max_upload).handle, host, port)
+    print("Listening on", ", ".join(str(sock.getsockname()) for sock in server.sockets))
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,53 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from unittest import TestCase
+from batch import convert_logs, submit_in_order
+
+def convert_log(filename: str) -> int:
+    if filename == 'bad.csv':
+        raise ValueError("not a PokerNow log")
+    return len(filename)
+
+class TestConvertLogs(TestCase):
+    def test_bad_log_does_not_stop_others(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            failures = convert_logs(convert_log, ['a.csv', 'bad.csv', 'long.csv'], jobs=2)
+        self.assertEqual({'a.csv': None, 'bad.csv': "ValueError: not a PokerNow log", 'long.csv': None}, failures)
+        self.assertEqual(["OK      a.csv (5 hands)",
+                          "FAILED  bad.csv: ValueError: not a PokerNow log",
+                          "OK      long.csv (8 hands)"], out.getvalue().splitlines())
+
+class TestSubmitInOrder(TestCase):
+    def test_bounded_and_in_order(self):
+        submitted = []
+        def items():
+            for i in range(10):
+                submitted.append(i)
+                yield (i,)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = submit_in_order(executor, lambda i: i * i, items(), in_flight=3)
+            results = []
+            for future in futures:
+                # never more than 3 submitted ahead of what has been taken
+                self.assertLessEqual(len(submitted) - len(results), 3)
+                results.append(future.result())
+            self.assertEqual([i * i for i in range(10)], results)
+
+
+    def test_close_cancels_the_rest(self):
+        released = threading.Event()
+        ran = []
+        def work(i):
+            released.wait(5)
+            ran.append(i)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            futures = submit_in_order(executor, work, ((i,) for i in range(10)), in_flight=3)
+            next(futures)
+            futures.close()
+            released.set()
+        self.assertEqual([0], ran)
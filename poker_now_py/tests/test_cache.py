@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from cache import GameCache, RenderCache, render_key
+from game import Game
+from reader import iter_rows_oldest_first
+
+PNLOGS = os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'pnlogs')
+
+class TestGameCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = os.path.join(self.directory, 'log2.csv')
+        shutil.copy(os.path.join(PNLOGS, 'log2.csv'), self.log)
+        self.cache = GameCache(os.path.join(self.directory, 'cache'))
+
+    def test_round_trip(self):
+        key = self.cache.key(self.log)
+        self.assertIsNone(self.cache.load(self.log, key))
+        hands = list(Game().iter_hands(iter_rows_oldest_first(self.log)))
+        self.cache.store(self.log, key, hands)
+
+        cached = self.cache.load(self.log, self.cache.key(self.log))
+        self.assertEqual([h.id for h in hands], [h.id for h in cached])
+        options = dict(hero_name="Hero", multiplier=1.0, table_name="DGen")
+        self.assertEqual([h.get_poker_stars_description(**options) for h in hands],
+                         [h.get_poker_stars_description(**options) for h in cached])
+
+    def test_changed_log_misses(self):
+        self.cache.store(self.log, self.cache.key(self.log), [])
+        with open(self.log, 'a', encoding='utf-8') as f:
+            f.write('\n')
+        self.assertIsNone(self.cache.load(self.log, self.cache.key(self.log)))
+
+    def test_name_map_applied_to_cached_hands(self):
+        name_map = {"player1": "Hero"}
+        parsed = Game(name_map=name_map)
+        parsed.parse_rows(iter_rows_oldest_first(self.log))
+        loaded = Game(name_map=name_map)
+        loaded.load_hands(Game().iter_hands(iter_rows_oldest_first(self.log)))
+
+        options = dict(hero_name="Hero", multiplier=1.0, table_name="DGen")
+        self.assertIn("Seat 1: Hero", loaded.hands[0].get_swc_description(**options))
+        self.assertEqual([h.get_swc_description(**options) for h in parsed.hands],
+                         [h.get_swc_description(**options) for h in loaded.hands])
+
+class TestRenderCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = os.path.join(PNLOGS, 'log2.csv')
+        self.hands = list(Game().iter_hands(iter_rows_oldest_first(self.log)))
+
+    def test_stored_renders_are_reused(self):
+        renders = RenderCache(self.directory, self.log)
+        key = render_key(self.hands[0], "swc", hero_name="Hero", multiplier=1.0, table_name="DGen")
+        self.assertIsNone(renders.get(key))
+        renders.put(key, "rendered")
+        renders.store()
+
+        renders = RenderCache(self.directory, self.log)
+        self.assertEqual("rendered", renders.get(key))
+        self.assertIsNone(renders.get(render_key(self.hands[0], "swc", hero_name="Hero", multiplier=2.0, table_name="DGen")))
+        self.assertIsNone(renders.get(render_key(self.hands[1], "swc", hero_name="Hero", multiplier=1.0, table_name="DGen")))
+
+    def test_key_follows_player_names(self):
+        options = dict(hero_name="Hero", multiplier=1.0, table_name="DGen")
+        renamed = Game(name_map={"player1": "Hero"})
+        renamed.parse_rows(iter_rows_oldest_first(self.log))
+        unused = Game(name_map={"nobody": "Hero"})
+        unused.parse_rows(iter_rows_oldest_first(self.log))
+
+        key = render_key(self.hands[0], "pokerstars", **options)
+        self.assertNotEqual(key, render_key(renamed.hands[0], "pokerstars", **options))
+        self.assertEqual(key, render_key(unused.hands[0], "pokerstars", **options))
+
+    def test_only_last_run_is_kept(self):
+        # converting with a new multiplier each time doesn't grow the cache
+        for multiplier in (1.0, 2.0, 3.0):
+            renders = RenderCache(self.directory, self.log)
+            for hand in self.hands:
+                key = render_key(hand, "swc", hero_name="Hero", multiplier=multiplier, table_name="DGen")
+                if renders.get(key) is None:
+                    renders.put(key, f"rendered x{multiplier}")
+            renders.store()
+            self.assertEqual(len(self.hands), len(RenderCache(self.directory, self.log).renders))
+
+        renders = RenderCache(self.directory, self.log)
+        self.assertEqual("rendered x3.0", renders.get(render_key(self.hands[0], "swc", hero_name="Hero", multiplier=3.0, table_name="DGen")))
+        self.assertIsNone(renders.get(render_key(self.hands[0], "swc", hero_name="Hero", multiplier=1.0, table_name="DGen")))
@@ -1,8 +1,19 @@
 import unittest
 from unittest import TestCase
-from card import EmojiCard, Card
+from card import EmojiCard, Card, CARD_TEXT, ERROR_CARD, card_mask, cards_text, parse_card
 
 class TestCard(TestCase):
     def test_emoji_card(self):
         self.assertEqual("2♥", EmojiCard.h2.value)
-        self.assertEqual("A♥", EmojiCard.hA.value)
\ No newline at end of file
+        self.assertEqual("A♥", EmojiCard.hA.value)
+
+    def test_card_tables(self):
+        self.assertEqual(0, parse_card("2♣"))
+        self.assertEqual(51, parse_card("A♠"))
+        self.assertEqual(ERROR_CARD, parse_card("Error"))
+        self.assertEqual("Th 9c Error", cards_text([parse_card("10♥"), parse_card("9♣"), ERROR_CARD]))
+        for emoji in EmojiCard:
+            self.assertEqual(emoji.emojiFlip().value, CARD_TEXT[parse_card(emoji.value)])
+
+    def test_card_mask(self):
+        self.assertEqual(0b11 | 1 << 51, card_mask([0, 1, 51, ERROR_CARD]))
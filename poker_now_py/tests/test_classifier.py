@@ -0,0 +1,30 @@
+from unittest import TestCase
+from card import parse_card
+from event import Event, EventKind
+from classifier import classify, parse_seats
+
+class TestClassifier(TestCase):
+    def test_starting_hand(self):
+        event = classify('-- starting hand #312  (No Limit Texas Hold\'em) (dealer: "Mo @ hOW39c8CLs") --')
+        self.assertEqual(Event(EventKind.start, "hOW39c8CLs", info="312"), event)
+        event = classify('-- starting hand #257  (No Limit Texas Hold\'em) (dead button) --')
+        self.assertEqual(Event(EventKind.start, None, info="257"), event)
+        self.assertEqual(Event(EventKind.end), classify('-- ending hand #312 --'))
+
+    def test_board(self):
+        self.assertEqual(Event(EventKind.board, cards=(parse_card("6♦"), parse_card("9♥"), parse_card("8♣")), street="flop"),
+                         classify('Flop:  [6♦, 9♥, 8♣]'))
+        self.assertEqual(Event(EventKind.board, cards=(parse_card("2♥"),), street="river", second_run=True),
+                         classify('River (second run): J♠, 4♦, 8♦, 3♠ [2♥]'))
+
+    def test_other_lines(self):
+        self.assertEqual(Event(EventKind.hole, cards=(parse_card("2♦"), parse_card("5♠"))), classify('Your hand is 2♦, 5♠'))
+        self.assertEqual(Event(EventKind.uncalled, amount=6.0), classify('Uncalled bet of 6.00 returned to "Mo @ hOW39c8CLs"'))
+        self.assertEqual(Event(EventKind.run_it_twice), classify('All players in hand choose to run it twice.'))
+        self.assertIsNone(classify('The player "bulge @ z9ieV0GL-n" joined the game with a stack of 561.75.'))
+        self.assertIsNone(classify('Remaining players decide whether to run it twice.'))
+        self.assertIsNone(classify(''))
+
+    def test_parse_seats(self):
+        self.assertEqual([(1, "mochi", "TkNg6TEK0X", 407.3), (4, "bub | bles", "rYQPN15HQa", 263.02)],
+                         parse_seats('Player stacks: #1 "mochi @ TkNg6TEK0X" (407.30) | #4 "bub | bles @ rYQPN15HQa" (263.02)'))
@@ -0,0 +1,37 @@
+import csv
+import io
+import os
+from unittest import TestCase
+from convert import convert
+from game import Game
+from reader import iter_rows_oldest_first
+
+PNLOGS = os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'pnlogs')
+
+class TestConvert(TestCase):
+    def setUp(self):
+        self.log = os.path.join(PNLOGS, 'log2.csv')
+        hands = Game().iter_hands(iter_rows_oldest_first(self.log))
+        self.expected = [h.get_swc_description(hero_name="Hero", multiplier=1.0, table_name="DGen") for h in hands]
+
+    def test_sources(self):
+        with open(self.log, 'rb') as f:
+            self.assertEqual(self.expected, list(convert(f, hero="Hero", site="swc")))
+        with open(self.log, 'rb') as f:
+            data = f.read()
+        self.assertEqual(self.expected, list(convert(data, hero="Hero", site="swc")))
+        self.assertEqual(self.expected, list(convert(io.BytesIO(data), hero="Hero", site="swc")))
+        with open(self.log, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(self.expected, list(convert(iter(rows), hero="Hero", site="swc")))
+        self.assertEqual(self.expected, list(convert(reversed(rows), hero="Hero", site="swc", oldest_first=True)))
+
+    def test_options(self):
+        with self.assertRaises(ValueError):
+            convert(b"", hero="Hero", site="party")
+        with self.assertRaises(ValueError):
+            convert(b"", hero="Hero", chip_formatter="eur")
+        with open(self.log, 'rb') as f:
+            histories = list(convert(f, hero="Hero", chip_formatter=lambda amount: f"{amount:.0f} chips"))
+        self.assertEqual(len(self.expected), len(histories))
+        self.assertIn(" chips", histories[0])
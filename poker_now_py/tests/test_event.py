@@ -0,0 +1,49 @@
+from unittest import TestCase
+from card import parse_card
+from event import Event, EventKind
+from classifier import parse_player_action
+from game import Game
+
+class TestEvent(TestCase):
+    def test_parse_player_action(self):
+        self.assertEqual(Event(EventKind.raise_to, "al4PxvTw8i", amount=19.52),
+                         parse_player_action('"antongeyyer @ al4PxvTw8i" raises to 19.52 and go all in'))
+        self.assertEqual(Event(EventKind.call, "rYQPN15HQa", amount=67.5),
+                         parse_player_action('"bubbles @ rYQPN15HQa" calls 67.50'))
+        self.assertEqual(Event(EventKind.post, "z9ieV0GL-n", amount=1.0, info="missing small blind"),
+                         parse_player_action('"bulge @ z9ieV0GL-n" posts a missing small blind of 1.00'))
+        self.assertEqual(Event(EventKind.show, "TkNg6TEK0X", cards=(parse_card("8♠"), parse_card("8♦"))),
+                         parse_player_action('"mochi @ TkNg6TEK0X" shows a 8♠, 8♦.'))
+        self.assertIsNone(parse_player_action('"bubbles @ rYQPN15HQa" chooses to  run it twice.'))
+
+    def test_parse_collect(self):
+        event = parse_player_action('"ben @ li0n-OAYVm" collected 1.67 from pot with Three of a Kind, 8\'s on the second run  (combination: 8♠, 8♥, 8♣, K♠, 7♣)')
+        self.assertEqual(EventKind.collect, event.kind)
+        self.assertEqual(1.67, event.amount)
+        self.assertEqual("Three of a Kind, 8's on the second run ", event.info)
+        self.assertTrue(event.second_run)
+
+        event = parse_player_action('"Mo @ hOW39c8CLs" collected 13.00 from pot')
+        self.assertEqual(Event(EventKind.collect, "hOW39c8CLs", amount=13.0), event)
+
+    def test_hand_events(self):
+        rows = [
+            ('-- starting hand #1  (No Limit Texas Hold\'em) (dealer: "a @ A") --', "2021-08-09T21:20:00.000Z", "1"),
+            ('Player stacks: #1 "a @ A" (100.00) | #2 "b @ B" (100.00)', "2021-08-09T21:20:00.000Z", "2"),
+            ('"a @ A" posts a small blind of 1.00', "2021-08-09T21:20:00.000Z", "3"),
+            ('"b @ B" posts a big blind of 2.00', "2021-08-09T21:20:00.000Z", "4"),
+            ('"a @ A" calls 2.00', "2021-08-09T21:20:01.000Z", "5"),
+            ('"b @ B" checks', "2021-08-09T21:20:02.000Z", "6"),
+            ('Flop:  [6♦, 9♥, 8♣]', "2021-08-09T21:20:03.000Z", "7"),
+            ('Turn: 6♦, 9♥, 8♣ [10♠]', "2021-08-09T21:20:04.000Z", "8"),
+            ('-- ending hand #1 --', "2021-08-09T21:20:05.000Z", "9"),
+        ]
+        hand, = Game().iter_hands(rows)
+        self.assertEqual([EventKind.start, EventKind.stacks, EventKind.post, EventKind.post, EventKind.call,
+                          EventKind.check, EventKind.board, EventKind.board, EventKind.end],
+                         [e.kind for e in hand.events])
+        self.assertEqual([parse_card("6♦"), parse_card("9♥"), parse_card("8♣")], hand.flop)
+        self.assertEqual(parse_card("10♠"), hand.turn)
+        self.assertIsNone(hand.river)
+        self.assertEqual({"A": 0, "B": 1}, hand.seat_index_by_id)
+        self.assertIs(hand.players_by_id["B"], hand.big_blind[0])
@@ -0,0 +1,81 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from follow import LogFollower
+from game import Game
+from reader import iter_rows_oldest_first
+
+PNLOGS = os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'pnlogs')
+
+class TestLogFollower(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'log.csv')
+        log = os.path.join(PNLOGS, 'log4.csv')
+        with open(log, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.reader(f))
+        self.header, self.rows = rows[0], rows[1:]
+        self.hands = list(Game().iter_hands(iter_rows_oldest_first(log)))
+        # the newest hand is held back until the log is no longer followed
+        self.expected = [h.id for h in self.hands[:-1]]
+
+    def write(self, rows, mode='w'):
+        with open(self.path, mode, encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if mode == 'w':
+                writer.writerow(self.header)
+            writer.writerows(rows)
+
+    def test_rewritten_newest_first_export(self):
+        follower = LogFollower(self.path, Game())
+        hands = []
+        for i, start in enumerate([len(self.rows) // 2, len(self.rows) // 3, 0]):
+            self.write(self.rows[start:])
+            os.utime(self.path, ns=(0, i))
+            hands.extend(follower.poll())
+        self.assertEqual(self.expected, [h.id for h in hands])
+
+    def test_appended_oldest_first_log(self):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(reversed(self.rows))
+        data = buf.getvalue()
+        self.write([])
+        follower = LogFollower(self.path, Game())
+        hands = []
+        # including writes that stop partway through a row
+        step = len(data) // 7 + 1
+        for i in range(0, len(data), step):
+            with open(self.path, 'a', encoding='utf-8', newline='') as f:
+                f.write(data[i:i + step])
+            hands.extend(follower.poll())
+        self.assertEqual(self.expected, [h.id for h in hands])
+        self.assertEqual([], follower.poll())
+        self.assertEqual(self.hands[-1].id, follower.finish().id)
+        self.assertIsNone(follower.finish())
+
+    def test_output_does_not_depend_on_polls(self):
+        def render(hands):
+            return [h.get_poker_stars_description(hero_name="Hero", multiplier=1.0, table_name="DGen") for h in hands]
+
+        # a log with cards shown after hands' ending lines
+        log = os.path.join(PNLOGS, 'log3.csv')
+        with open(log, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.reader(f))[1:]
+        expected = render(Game().iter_hands(iter_rows_oldest_first(log)))
+
+        self.write([])
+        row_by_row = LogFollower(self.path, Game())
+        hands = []
+        for row in reversed(rows):
+            self.write([row], mode='a')
+            hands.extend(row_by_row.poll())
+        hands.append(row_by_row.finish())
+
+        all_at_once = LogFollower(self.path, Game())
+        bulk = all_at_once.poll() + [all_at_once.finish()]
+        self.assertEqual(expected, render(hands))
+        self.assertEqual(expected, render(bulk))
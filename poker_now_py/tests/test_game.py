@@ -0,0 +1,78 @@
+import csv
+import os
+from unittest import TestCase
+from game import Game
+from reader import ENTRY, iter_rows_oldest_first
+
+PNLOGS = os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'pnlogs')
+
+class TestGame(TestCase):
+    def test_iter_hands_is_lazy(self):
+        consumed = []
+        def rows():
+            for row in iter_rows_oldest_first(os.path.join(PNLOGS, 'log2.csv')):
+                consumed.append(row)
+                yield row
+
+        hands = Game().iter_hands(rows())
+        first_hand = next(hands)
+        self.assertTrue(first_hand.lines[0].startswith('-- starting hand #1 '))
+        self.assertTrue(consumed[-1][ENTRY].startswith('-- starting hand #2 '))
+        self.assertEqual(5, 1 + len(list(hands)))
+
+    def test_iter_hands_matches_eager_parse(self):
+        log = os.path.join(PNLOGS, 'log4.csv')
+        eager = Game()
+        eager.parse_rows(iter_rows_oldest_first(log))
+        streamed = list(Game().iter_hands(iter_rows_oldest_first(log)))
+        self.assertEqual([h.id for h in eager.hands], [h.id for h in streamed])
+        self.assertEqual([h.lines for h in eager.hands], [h.lines for h in streamed])
+
+    def test_dict_rows_and_hand_lines_only(self):
+        log = os.path.join(PNLOGS, 'log3.csv')
+        with open(log, encoding='utf-8-sig', newline='') as f:
+            from_dicts = Game(rows=list(csv.DictReader(f))).hands
+        hand_lines = list(Game().iter_hands(iter_rows_oldest_first(log, hand_lines_only=True)))
+        options = dict(hero_name="Hero", multiplier=1.0, table_name="DGen")
+        self.assertEqual([h.get_poker_stars_description(**options) for h in from_dicts],
+                         [h.get_poker_stars_description(**options) for h in hand_lines])
+
+    def test_hand_chunks_parse_like_whole_log(self):
+        log = os.path.join(PNLOGS, 'log1.csv')
+        whole = list(Game().iter_hands(iter_rows_oldest_first(log)))
+
+        chunked = []
+        for dealer_id, rows in Game().iter_hand_chunks(iter_rows_oldest_first(log), hands_per_chunk=1):
+            game = Game()
+            game.dealer_id = dealer_id
+            chunked.extend(game.iter_hands(rows))
+
+        self.assertEqual([h.id for h in whole], [h.id for h in chunked])
+        self.assertEqual([h.dealer and h.dealer.id for h in whole], [h.dealer and h.dealer.id for h in chunked])
+        self.assertEqual([h.lines for h in whole], [h.lines for h in chunked])
+
+    def test_players_are_shared_between_hands(self):
+        first_hand, second_hand = list(Game().iter_hands(iter_rows_oldest_first(os.path.join(PNLOGS, 'log2.csv'))))[:2]
+        shared = set(first_hand.players_by_id) & set(second_hand.players_by_id)
+        self.assertTrue(shared)
+        for pid in shared:
+            self.assertIs(first_hand.players_by_id[pid], second_hand.players_by_id[pid])
+
+    def test_rendering_leaves_hands_unchanged(self):
+        options = dict(hero_name="Hero", multiplier=1.0, table_name="DGen")
+        for hand in Game().iter_hands(iter_rows_oldest_first(os.path.join(PNLOGS, 'log3.csv'))):
+            swc = hand.get_swc_description(**options)
+            pokerstars = hand.get_poker_stars_description(**options)
+            self.assertEqual(swc, hand.get_swc_description(**options))
+            self.assertEqual(pokerstars, hand.get_poker_stars_description(**options))
+
+    def test_iter_complete_hands_holds_back_newest_hand(self):
+        rows = list(iter_rows_oldest_first(os.path.join(PNLOGS, 'log3.csv')))
+        hands = list(Game().iter_hands(rows))
+        self.assertEqual([h.id for h in hands[:-1]], [h.id for h in Game().iter_complete_hands(rows)])
+
+        # cards are still shown after the ending line
+        ending = next(i for i, row in enumerate(rows) if row[ENTRY] == '-- ending hand #142 --')
+        self.assertIn(' shows a ', rows[ending + 1][ENTRY])
+        complete = list(Game().iter_complete_hands(rows[:ending + 1]))
+        self.assertEqual('141', complete[-1].pn_hand_number)
@@ -0,0 +1,192 @@
+import gzip
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Optional
+from unittest import TestCase
+from inbox import MAX_ATTEMPTS, Inbox
+from reader import log_base, open_log
+
+def convert_or_die(filename: str) -> int:
+    with open(filename, encoding='utf-8') as f:
+        content = f.read()
+    if content == 'die':
+        # as if killed for running out of memory
+        os._exit(1)
+    with open(log_base(filename) + '.txt', 'w', encoding='utf-8') as f:
+        f.write(content.upper())
+    return len(content)
+
+class TestInbox(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.released = threading.Event()
+        self.released.set()
+
+    def convert_log(self, filename: str) -> int:
+        self.released.wait()
+        with open_log(filename) as f:
+            content = f.read().decode('utf-8')
+        if content == 'bad':
+            raise ValueError("not a PokerNow log")
+        with open(self.output(filename), 'w', encoding='utf-8') as f:
+            f.write(content.upper())
+        return len(content)
+
+    def output(self, filename: str) -> str:
+        return log_base(filename) + '.txt'
+
+    def put(self, name: str, content: str, mode='w'):
+        with open(os.path.join(self.directory, name), mode, encoding='utf-8') as f:
+            f.write(content)
+
+    def inbox(self, jobs: int, memory_budget: int = 0, workers: Optional[int] = None) -> Inbox:
+        inbox = Inbox(self.directory, self.convert_log, lambda claimed: [self.output(claimed)],
+                      lambda: ThreadPoolExecutor(max_workers=workers or jobs), jobs=jobs, memory_budget=memory_budget)
+        self.addCleanup(lambda: inbox.executor.shutdown())
+        return inbox
+
+    def listing(self, *path):
+        return sorted(os.listdir(os.path.join(self.directory, *path)))
+
+    def test_converted_and_failed_logs_move_out(self):
+        inbox = self.inbox(jobs=2)
+        self.put('good.csv', 'hands')
+        self.put('bad.csv', 'bad')
+        self.put('notes.txt', 'not a log')
+        with redirect_stdout(StringIO()) as out:
+            # not claimed until their size holds still for a poll
+            inbox.poll()
+            self.assertEqual({}, inbox.running)
+            inbox.poll()
+            self.assertEqual(['bad.csv', 'good.csv'], sorted(os.path.basename(claim.log) for claim in inbox.running.values()))
+            wait(list(inbox.running))
+            inbox.poll()
+
+        self.assertEqual(['good.csv', 'good.txt'], self.listing('done'))
+        with open(os.path.join(self.directory, 'done', 'good.txt'), encoding='utf-8') as f:
+            self.assertEqual('HANDS', f.read())
+        self.assertEqual(['bad.csv', 'bad.error.txt'], self.listing('failed'))
+        with open(os.path.join(self.directory, 'failed', 'bad.error.txt'), encoding='utf-8') as f:
+            self.assertEqual("ValueError: not a PokerNow log\n", f.read())
+        self.assertEqual(['done', 'failed', 'notes.txt', 'processing'], self.listing())
+        self.assertEqual(["FAILED  bad.csv: ValueError: not a PokerNow log", "OK      good.csv (5 hands)"],
+                         sorted(out.getvalue().splitlines()))
+
+    def test_growing_log_waits(self):
+        inbox = self.inbox(jobs=1)
+        self.put('log.csv', 'still ')
+        inbox.poll()
+        self.put('log.csv', 'copying', mode='a')
+        inbox.poll()
+        self.assertEqual({}, inbox.running)
+        inbox.poll()
+        self.assertEqual(1, len(inbox.running))
+
+    def test_stop_hands_back_logs_not_started(self):
+        # more jobs than workers, so that one log waits in the pool
+        inbox = self.inbox(jobs=2, workers=1)
+        self.put('a.csv', 'first')
+        self.put('b.csv', 'second')
+        self.released.clear()
+        with redirect_stdout(StringIO()):
+            inbox.poll()
+            inbox.poll()
+            self.assertEqual(2, len(inbox.running))
+            threading.Timer(0.1, self.released.set).start()
+            inbox.stop()
+
+        self.assertEqual(['a.csv', 'a.txt'], self.listing('done'))
+        self.assertEqual(['b.csv', 'done', 'failed', 'processing'], self.listing())
+        self.assertEqual([], self.listing('processing'))
+
+    def test_memory_budget_counts_decompressed_size(self):
+        # small on disk, but 100 KB each once decompressed
+        for name in ('a.csv.gz', 'b.csv.gz'):
+            with open(os.path.join(self.directory, name), 'wb') as f:
+                f.write(gzip.compress(b'x' * 100_000))
+        inbox = self.inbox(jobs=2, memory_budget=150_000)
+        self.released.clear()
+        with redirect_stdout(StringIO()):
+            inbox.poll()
+            inbox.poll()
+            self.assertEqual([('a.csv.gz', 100_000)], [(os.path.basename(claim.log), claim.size) for claim in inbox.running.values()])
+            self.released.set()
+            wait(list(inbox.running))
+            inbox.poll()
+            self.assertEqual(['b.csv.gz'], [os.path.basename(claim.log) for claim in inbox.running.values()])
+            wait(list(inbox.running))
+            inbox.poll()
+        self.assertEqual(['a.csv.gz', 'a.txt', 'b.csv.gz', 'b.txt'], self.listing('done'))
+
+    def test_dead_worker_restarts_the_pool(self):
+        inbox = Inbox(self.directory, convert_or_die, lambda claimed: [self.output(claimed)],
+                      lambda: ProcessPoolExecutor(max_workers=2), jobs=2)
+        self.addCleanup(lambda: inbox.executor.shutdown())
+        for name, content in (('a.csv', 'first'), ('die.csv', 'die'), ('z.csv', 'last')):
+            self.put(name, content)
+        with redirect_stdout(StringIO()) as out:
+            inbox.poll()
+            deadline = time.monotonic() + 60
+            while inbox.running or len(self.listing()) > 4:
+                self.assertLess(time.monotonic(), deadline)
+                wait(list(inbox.running))
+                inbox.poll()
+
+        # the logs taken down with it were converted again
+        self.assertEqual(['a.csv', 'a.txt', 'z.csv', 'z.txt'], self.listing('done'))
+        self.assertEqual(['die.csv', 'die.error.txt'], self.listing('failed'))
+        self.assertEqual(MAX_ATTEMPTS, out.getvalue().count("A worker process died"))
+        self.assertEqual({}, inbox.attempts)
+
+    def test_recover_logs_of_stopped_daemon(self):
+        # a process that has exited, so its pid is free
+        stopped = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+        pid = int(stopped.stdout)
+        claims = os.path.join(self.directory, 'processing', f"{socket.gethostname()}-{pid}")
+        os.makedirs(claims)
+        for name in ('a.csv', 'a.txt'):
+            with open(os.path.join(claims, name), 'w', encoding='utf-8') as f:
+                f.write('hands')
+        inbox = self.inbox(jobs=1)
+        with redirect_stdout(StringIO()) as out:
+            inbox.recover()
+        self.assertEqual("Recovered a.csv from a stopped daemon\n", out.getvalue())
+        self.assertEqual(['a.csv', 'done', 'failed', 'processing'], self.listing())
+        # only its own claims are left
+        self.assertEqual([os.path.basename(inbox.processing)], self.listing('processing'))
+
+    def test_archive_converted_as_one(self):
+        with zipfile.ZipFile(os.path.join(self.directory, 'logs.zip'), 'w') as zf:
+            zf.writestr('a.csv', 'first')
+            zf.writestr('b.csv', 'second')
+            zf.writestr('notes.txt', 'not a log')
+        with zipfile.ZipFile(os.path.join(self.directory, 'bad.zip'), 'w') as zf:
+            zf.writestr('good.csv', 'hands')
+            zf.writestr('bad.csv', 'bad')
+        inbox = self.inbox(jobs=2, memory_budget=1)
+        with redirect_stdout(StringIO()) as out:
+            inbox.poll()
+            inbox.poll()
+            # sized by the logs in it
+            self.assertEqual([('bad.zip', 8)], [(os.path.basename(claim.log), claim.size) for claim in inbox.running.values()])
+            while inbox.running or len(self.listing()) > 3:
+                wait(list(inbox.running))
+                inbox.poll()
+
+        self.assertEqual(['logs.a.txt', 'logs.b.txt', 'logs.zip'], self.listing('done'))
+        self.assertEqual(['bad.error.txt', 'bad.zip'], self.listing('failed'))
+        # nor is the output of its good log left behind
+        self.assertEqual([], self.listing('processing', os.path.basename(inbox.processing)))
+        self.assertEqual(["FAILED  bad.zip: ValueError: not a PokerNow log", "OK      logs.zip (11 hands)"],
+                         sorted(out.getvalue().splitlines()))
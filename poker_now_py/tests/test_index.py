@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from unittest import TestCase
+from game import Game
+from index import index_filename, iter_selected_hands, load_index, parse_hand_range, select_hands
+from reader import iter_rows_oldest_first
+
+PNLOGS = os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'pnlogs')
+
+class TestHandIndex(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.log = os.path.join(directory, 'log3.csv')
+        shutil.copy(os.path.join(PNLOGS, 'log3.csv'), self.log)
+        self.hands = list(Game().iter_hands(iter_rows_oldest_first(self.log)))
+
+    def render(self, hands):
+        return [h.get_poker_stars_description(hero_name="Hero", multiplier=1.0, table_name="DGen") for h in hands]
+
+    def test_index_matches_parse(self):
+        spans = load_index(self.log)
+        self.assertTrue(os.path.exists(index_filename(self.log)))
+        self.assertEqual([(h.pn_hand_number, h.id) for h in self.hands], [(s.number, s.id) for s in spans])
+        self.assertEqual(spans, load_index(self.log))
+
+    def test_selected_hands_parse_like_whole_log(self):
+        spans = load_index(self.log)
+        runs = select_hands(spans, *parse_hand_range("100-120"))
+        self.assertEqual(1, len(runs))
+        selected = list(iter_selected_hands(self.log, runs, Game))
+        self.assertEqual(self.render(h for h in self.hands if 100 <= int(h.pn_hand_number) <= 120), self.render(selected))
+
+        since = self.hands[50].date
+        until = datetime.fromtimestamp(self.hands[60].date.timestamp(), tz=timezone.utc)
+        selected = list(iter_selected_hands(self.log, select_hands(spans, since=since, until=until), Game))
+        self.assertEqual(self.render(self.hands[50:61]), self.render(selected))
+
+    def test_parse_hand_range(self):
+        self.assertEqual((4000, 4100), parse_hand_range("4000-4100"))
+        self.assertEqual((4000, 4000), parse_hand_range("4000"))
+        self.assertEqual((4000, None), parse_hand_range("4000-"))
+        self.assertEqual((None, 4100), parse_hand_range("-4100"))
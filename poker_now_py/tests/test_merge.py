@@ -0,0 +1,32 @@
+import os
+from unittest import TestCase
+from game import Game
+from merge import merge_hands
+from reader import iter_rows_oldest_first
+
+PNLOGS = os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'pnlogs')
+
+class TestMerge(TestCase):
+    def setUp(self):
+        self.hands = list(Game().iter_hands(iter_rows_oldest_first(os.path.join(PNLOGS, 'log3.csv'))))
+
+    def render(self, hands):
+        return [h.get_poker_stars_description(hero_name="Hero", multiplier=1.0, table_name="DGen") for h in hands]
+
+    def test_overlapping_logs(self):
+        # a download partway through a hand, and the final export
+        cut = self.hands[:101]
+        partial = Game().iter_hands(iter_rows_oldest_first(os.path.join(PNLOGS, 'log3.csv')))
+        mid = [next(partial) for _ in range(100)]
+        last = next(partial)
+        last.events = last.events[:3]
+        mid.append(last)
+        expected = self.render(self.hands)
+        self.assertEqual(expected, self.render(merge_hands([mid, self.hands])))
+        self.assertEqual(expected, self.render(merge_hands([self.hands, mid])))
+        self.assertEqual(expected, self.render(merge_hands([self.hands[150:], self.hands[:200], cut])))
+
+    def test_separate_logs_interleave(self):
+        odd, even = self.hands[1::2], self.hands[::2]
+        self.assertEqual([h.id for h in self.hands], [h.id for h in merge_hands([odd, even])])
+        self.assertEqual([], list(merge_hands([])))
@@ -0,0 +1,29 @@
+import random
+from unittest import TestCase
+from ordering import ROW_OVERHEAD, sort_rows
+
+class TestOrdering(TestCase):
+    def rows(self, count: int):
+        return [(f'entry {i}', f'2021-08-09T21:20:{i % 60:02}.000Z', str(i)) for i in range(1, count + 1)]
+
+    def test_sort_in_memory(self):
+        rows = self.rows(100)
+        shuffled = rows[:]
+        random.Random(1).shuffle(shuffled)
+        self.assertEqual(rows, list(sort_rows(shuffled)))
+        self.assertEqual([], list(sort_rows([])))
+
+    def test_sort_spilling_runs(self):
+        rows = self.rows(1000)
+        shuffled = rows[:]
+        random.Random(2).shuffle(shuffled)
+        # room for about 10 rows at a time, so 100 runs are merged
+        self.assertEqual(rows, list(sort_rows(shuffled, memory=10 * (len('entry 100') + ROW_OVERHEAD))))
+
+    def test_repeated_rows_left_out(self):
+        rows = self.rows(50)
+        # two overlapping downloads of the same log
+        merged = rows[:30] + rows[20:]
+        random.Random(3).shuffle(merged)
+        self.assertEqual(rows, list(sort_rows(merged)))
+        self.assertEqual(rows, list(sort_rows(merged, memory=1)))
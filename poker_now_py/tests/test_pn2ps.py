@@ -0,0 +1,61 @@
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+from convert import SITES, convert
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+PNLOGS = os.path.join(ROOT, 'resources', 'pnlogs')
+
+class TestPN2PS(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = os.path.join(self.directory, 'log1.csv')
+        shutil.copy(os.path.join(PNLOGS, 'log1.csv'), self.log)
+
+    def pn2ps(self, *args, log=None) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, os.path.join(ROOT, 'pn2ps'), 'Hero', log or self.log, *args],
+                              capture_output=True, text=True)
+
+    def test_several_sites_from_one_parse(self):
+        self.assertEqual(0, self.pn2ps('--site', ','.join(SITES)).returncode)
+        for site in SITES:
+            with open(self.log, 'rb') as f:
+                expected = ''.join(f'{descr}\n\n' for descr in convert(f, hero='Hero', site=site))
+            with open(os.path.join(self.directory, f'log1.{site}.txt'), encoding='utf-8') as f:
+                self.assertEqual(expected, f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'log1.txt')))
+
+    def test_unknown_site(self):
+        result = self.pn2ps('--site', 'pokerstars,swx')
+        self.assertEqual(2, result.returncode)
+        self.assertIn("unknown --site swx", result.stderr)
+        self.assertEqual(['log1.csv'], os.listdir(self.directory))
+
+    def test_since_last_waits_for_shows_after_ending_line(self):
+        source = os.path.join(PNLOGS, 'log3.csv')
+        with open(source, encoding='utf-8-sig', newline='') as f:
+            header, *rows = csv.reader(f)
+        # the log as downloaded just after hand #142 ended, before its shows
+        ending = next(i for i, row in enumerate(rows) if row[0] == '-- ending hand #142 --')
+        log = os.path.join(self.directory, 'log3.csv')
+        for part in (rows[ending:], rows):
+            with open(log, 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f).writerows([header] + part)
+            self.assertEqual(0, self.pn2ps('--since-last', log=log).returncode)
+
+        with open(source, 'rb') as f:
+            expected = [f'{descr}\n\n' for descr in convert(f, hero='Hero', site='pokerstars')]
+        with open(os.path.join(self.directory, 'log3.txt'), encoding='utf-8') as f:
+            # only the newest hand is still held back
+            self.assertEqual(''.join(expected[:-1]), f.read())
+
+    def test_jobs_must_be_positive(self):
+        for args in (['-j', '0'], ['--split-hands', '-j', '0']):
+            result = self.pn2ps(*args)
+            self.assertEqual(2, result.returncode)
+            self.assertIn("--jobs must be at least 1", result.stderr)
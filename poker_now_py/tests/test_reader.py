@@ -0,0 +1,102 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import TestCase
+from reader import ENTRY, ORDER, iter_rows_oldest_first, list_logs, log_base, log_size, rows_newer_than
+
+class TestReader(TestCase):
+    def write_log(self, content: str) -> str:
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_rows_oldest_first(self):
+        path = self.write_log('entry,at,order\n'
+                              '"""b @ 2"" checks",2021-08-09T21:20:08.000Z,2\n'
+                              '"""a @ 1"" checks",2021-08-09T21:20:07.000Z,1\n')
+        rows = list(iter_rows_oldest_first(path))
+        self.assertEqual(['1', '2'], [r[ORDER] for r in rows])
+        self.assertEqual('"a @ 1" checks', rows[0][ENTRY])
+
+    def test_multiline_quoted_field(self):
+        path = self.write_log('entry,at,order\r\n'
+                              '"line one\r\n""quoted""\r\nline three",2021-08-09T21:20:08.000Z,2\r\n'
+                              'plain,2021-08-09T21:20:07.000Z,1')
+        rows = list(iter_rows_oldest_first(path))
+        self.assertEqual(['plain', 'line one\r\n"quoted"\r\nline three'], [r[ENTRY] for r in rows])
+        self.assertEqual('2', rows[1][ORDER])
+
+    def test_empty_log(self):
+        self.assertEqual([], list(iter_rows_oldest_first(self.write_log(''))))
+        self.assertEqual([], list(iter_rows_oldest_first(self.write_log('entry,at,order\n'))))
+
+    def test_rows_newer_than(self):
+        path = self.write_log('\ufeffentry,at,order\n'
+                              'c,2021-08-09T21:20:09.000Z,3\n'
+                              'b,2021-08-09T21:20:08.000Z,2\n'
+                              'a,2021-08-09T21:20:07.000Z,1\n')
+        self.assertEqual(['b', 'c'], [r[ENTRY] for r in rows_newer_than(path, 1)])
+        self.assertEqual([], rows_newer_than(path, 3))
+
+    def test_hand_lines_only(self):
+        rows = ['"The player ""a @ 1"" joined the game with a stack of 100.",2021-08-09T21:20:09.000Z,4',
+                '"""a @ 1"" checks",2021-08-09T21:20:08.000Z,3',
+                'Turn: 6♦ [A♠],2021-08-09T21:20:07.000Z,2',
+                '"WARNING: the admin queued the stack change",2021-08-09T21:20:06.000Z,1']
+        path = self.write_log('entry,at,order\n' + '\n'.join(rows) + '\n')
+        self.assertEqual(['2', '3'], [r[ORDER] for r in iter_rows_oldest_first(path, hand_lines_only=True)])
+        self.assertEqual(['3'], [r[ORDER] for r in rows_newer_than(path, 2, hand_lines_only=True)])
+
+        # entry isn't the first column, so rows are decoded before they're skipped
+        path = self.write_log('order,at,entry\n' + '\n'.join(','.join(reversed(row.rsplit(',', 2))) for row in rows) + '\n')
+        self.assertEqual([('Turn: 6♦ [A♠]', '2021-08-09T21:20:07.000Z', '2'), ('"a @ 1" checks', '2021-08-09T21:20:08.000Z', '3')],
+                         list(iter_rows_oldest_first(path, hand_lines_only=True)))
+
+    def test_compressed_logs(self):
+        content = ('\ufeffentry,at,order\n'
+                   '"b\nc",2021-08-09T21:20:08.000Z,2\n'
+                   'a,2021-08-09T21:20:07.000Z,1\n').encode('utf-8')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        logs = []
+        for suffix, compress in [('.gz', gzip.compress), ('.bz2', bz2.compress), ('.xz', lzma.compress)]:
+            path = os.path.join(directory, f'log.csv{suffix}')
+            with open(path, 'wb') as f:
+                f.write(compress(content))
+            logs.append(path)
+        archive = os.path.join(directory, 'logs.zip')
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('may/log.csv', content)
+            zf.writestr('notes.txt', 'not a log')
+        self.assertEqual([os.path.join(archive, 'may/log.csv')], list_logs(archive))
+        logs += list_logs(archive)
+
+        for path in logs:
+            self.assertEqual(['a', 'b\nc'], [r[ENTRY] for r in iter_rows_oldest_first(path)])
+            self.assertEqual(['b\nc'], [r[ENTRY] for r in rows_newer_than(path, 1)])
+            self.assertEqual(len(content), log_size(path))
+        self.assertEqual(os.path.join(directory, 'log'), log_base(logs[0]))
+        self.assertEqual(os.path.join(directory, 'logs.may.log'), log_base(logs[-1]))
+
+    def test_gzip_size_read_from_trailer(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'log.csv.gz')
+        compressed = bytearray(gzip.compress(b'x' * 100_000))
+        # not decompressed, so a damaged middle goes unnoticed
+        compressed[len(compressed) // 2] ^= 0xff
+        with open(path, 'wb') as f:
+            f.write(compressed)
+        self.assertEqual(100_000, log_size(path))
+
+        # large enough to hold 4 GiB, so counted
+        content = os.urandom(5 << 20)
+        with open(path, 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=1))
+        self.assertEqual(len(content), log_size(path))
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from convert import convert
+from game import Game
+from reader import iter_rows_oldest_first
+from server import HANDS_PER_CHUNK, BadRequest, ConversionServer, convert_upload, parse_options
+
+PNLOGS = os.path.join(os.path.dirname(__file__), '..', '..', 'resources', 'pnlogs')
+
+class TestServer(TestCase):
+    def setUp(self):
+        self.log = os.path.join(PNLOGS, 'log2.csv')
+        with open(self.log, 'rb') as f:
+            self.data = f.read()
+        hands = Game().iter_hands(iter_rows_oldest_first(self.log))
+        self.expected = [h.get_poker_stars_description(hero_name="Hero", multiplier=1.0, table_name="DGen") for h in hands]
+
+    def test_parse_options(self):
+        options = parse_options("hero=Hero&site=SWC&multiplier=2&chip_formatter=raw&namemap=a+b")
+        self.assertEqual(("Hero", "swc", 2.0, "raw", {"a": "b"}),
+                         (options.hero, options.site, options.multiplier, options.chip_formatter, options.name_map))
+        for query in ["site=swc", "hero=Hero&site=party", "hero=Hero&chip_formatter=eur", "hero=Hero&namemap=a", "hero=Hero&seats=x"]:
+            with self.assertRaises(BadRequest):
+                parse_options(query)
+
+    def test_convert_upload(self):
+        self.assertEqual(self.expected, convert_upload(self.data, parse_options("hero=Hero")))
+
+    def test_handle(self):
+        async def request(head: bytes) -> bytes:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                server = await asyncio.start_server(ConversionServer(executor, max_upload=len(self.data)).handle, "127.0.0.1", 0)
+                async with server:
+                    reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname())
+                    writer.write(head)
+                    response = await reader.read()
+                    writer.close()
+                    return response
+
+        head = f"POST /convert?hero=Hero HTTP/1.1\r\nContent-Length: {len(self.data)}\r\n\r\n".encode()
+        response = asyncio.run(request(head + self.data))
+        status, _, body = response.partition(b"\r\n\r\n")
+        self.assertTrue(status.startswith(b"HTTP/1.1 200 "))
+        chunks = []
+        while True:
+            size, _, body = body.partition(b"\r\n")
+            if int(size, 16) == 0:
+                break
+            chunks.append(body[:int(size, 16)].decode())
+            body = body[int(size, 16) + 2:]
+        self.assertEqual([f"{descr}\n\n" for descr in self.expected], chunks)
+
+        head = f"POST /convert?hero=Hero HTTP/1.1\r\nContent-Length: {len(self.data) + 1}\r\n\r\n".encode()
+        self.assertTrue(asyncio.run(request(head)).startswith(b"HTTP/1.1 413 "))
+
+    def test_convert_upload_in_chunks(self):
+        with open(os.path.join(PNLOGS, 'log3.csv'), 'rb') as f:
+            data = f.read()
+        expected = list(convert(data, hero="Hero", site="swc"))
+        self.assertGreater(len(expected), 3 * HANDS_PER_CHUNK)
+        self.assertEqual(expected, convert_upload(data, parse_options("hero=Hero&site=swc")))
+
+    def test_first_hands_sent_before_the_rest_are_converted(self):
+        with open(os.path.join(PNLOGS, 'log3.csv'), 'rb') as f:
+            data = f.read()
+        # later chunks wait until the client has some of the response
+        received = threading.Event()
+
+        class GatedExecutor(ThreadPoolExecutor):
+            submitted = 0
+
+            def submit(self, fn, *args):
+                self.submitted += 1
+                if self.submitted == 1:
+                    return super().submit(fn, *args)
+                return super().submit(lambda: received.wait(5) and fn(*args))
+
+        executor = GatedExecutor(max_workers=4)
+        self.addCleanup(executor.shutdown)
+
+        async def request() -> bytes:
+            server = await asyncio.start_server(ConversionServer(executor, max_upload=len(data)).handle, "127.0.0.1", 0)
+            async with server:
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname())
+                writer.write(f"POST /convert?hero=Hero HTTP/1.1\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+                head = await reader.readuntil(b"\r\n\r\n")
+                first = await reader.readuntil(b"PokerStars Hand #")
+                received.set()
+                rest = await reader.read()
+                writer.close()
+                return head + first + rest
+
+        response = asyncio.run(request())
+        self.assertGreater(executor.submitted, 1)
+        self.assertTrue(response.startswith(b"HTTP/1.1 200 "))
+        self.assertTrue(response.endswith(b"\r\n0\r\n\r\n"))
@@ -0,0 +1,22 @@
+from datetime import datetime
+from unittest import TestCase
+from util import TIMESTAMP_FORMAT, parse_name_map, parse_timestamp
+
+class TestUtil(TestCase):
+    def test_parse_timestamp_matches_strptime(self):
+        for at in ["2021-08-09T21:33:22.122Z", "2020-07-14T12:59:55.000Z", "2021-08-30T01:41:19.067+0000"]:
+            expected = datetime.strptime(at, TIMESTAMP_FORMAT)
+            parsed = parse_timestamp(at)
+            self.assertEqual(expected, parsed)
+            self.assertEqual(expected.timestamp(), parsed.timestamp())
+            self.assertEqual(expected.strftime("%Y/%m/%d %H:%M:%S"), parsed.strftime("%Y/%m/%d %H:%M:%S"))
+
+    def test_parse_timestamp_rejects_garbage(self):
+        with self.assertRaises(ValueError):
+            parse_timestamp("")
+
+    def test_parse_name_map(self):
+        self.assertEqual({"Big Joe": "joe", "al": "Al B"}, parse_name_map("Big[[SPACE]]Joe joe  al Al[[SPACE]]B"))
+        self.assertEqual({}, parse_name_map(""))
+        with self.assertRaises(ValueError):
+            parse_name_map("a b c")
@@ -0,0 +1,31 @@
+import gzip
+import io
+from unittest import TestCase
+from writer import BackgroundWriter
+
+class FailingFile(io.BytesIO):
+    def write(self, data):
+        raise OSError("disk full")
+
+class TestBackgroundWriter(TestCase):
+    def test_writes_everything_in_order(self):
+        raw = io.BytesIO()
+        raw.close = lambda: None
+        with BackgroundWriter(raw, buffer_size=10, queue_size=1) as out:
+            for i in range(1000):
+                out.write(f"hand {i}\n\n")
+            out.flush()
+        self.assertEqual("".join(f"hand {i}\n\n" for i in range(1000)), raw.getvalue().decode())
+
+    def test_gzip(self):
+        raw = io.BytesIO()
+        with BackgroundWriter(raw, compress=True, close_raw=False) as out:
+            out.write("A♠ K♠\n")
+        self.assertEqual("A♠ K♠\n", gzip.decompress(raw.getvalue()).decode())
+
+    def test_write_errors_are_raised(self):
+        out = BackgroundWriter(FailingFile(), buffer_size=1, queue_size=1)
+        with self.assertRaises(OSError):
+            for _ in range(100):
+                out.write("hand")
+            out.close()
@@ -2,10 +2,14 @@
 basic util functions for helping translate swift to python
 '''
 
-from typing import List, Optional
+from typing import Dict, List, Optional
+from datetime import datetime
 from hashlib import md5
 import struct
 
+# from Swift format string "yyyy-MM-dd'T'HH:mm:ss.SSSZ"
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
 def nil_guard(opt, other):
     '''
     This captures the semantics of `opt ?? other`
@@ -46,4 +50,29 @@ def slice(content: str, start:str, end: str) -> Optional[str]:
         idx_end = content[idx_start:].index(end) + idx_start
         return content[idx_start:idx_end]
     except:
-        return None
\ No newline at end of file
+        return None
+
+def parse_timestamp(at: str) -> datetime:
+    '''
+    Parse a PokerNow timestamp such as `2021-08-09T21:33:22.122Z`. This gives the
+    same datetime as `datetime.strptime(at, TIMESTAMP_FORMAT)` but is much faster:
+    `fromisoformat` only accepts a trailing `Z` from Python 3.11, so it is
+    rewritten as `+00:00` first. Anything else falls back to `strptime`.
+    '''
+    try:
+        if at.endswith("Z"):
+            return datetime.fromisoformat(f"{at[:-1]}+00:00")
+        return datetime.fromisoformat(at)
+    except ValueError:
+        return datetime.strptime(at, TIMESTAMP_FORMAT)
+
+def parse_name_map(text: str) -> Dict[str, str]:
+    '''
+    Parse a name map given as whitespace separated `old new` pairs, with
+    `[[SPACE]]` standing in for spaces within a name. Raises `ValueError` if a
+    name is left without a pair.
+    '''
+    names = [name.replace("[[SPACE]]", " ") for name in text.split()]
+    if len(names) % 2:
+        raise ValueError(f"name map has an odd number of names: {text!r}")
+    return {names[i]: names[i+1] for i in range(0, len(names), 2)}
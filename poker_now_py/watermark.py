@@ -0,0 +1,51 @@
+'''
+watermark.py
+
+Records how far into a PokerNow log `pn2ps --since-last` has converted, so that
+the next run over the same (grown) log only converts the hands added since.
+'''
+
+import json
+import os
+from typing import NamedTuple, Optional
+from hand import Hand
+from reader import log_base
+
+class Watermark(NamedTuple):
+    '''
+    + `order`: the highest `order` of any row of a converted hand; rows up to
+      it are skipped next time
+    + `hand_id`: the id of the last converted hand
+    + `dealer_id`: the dealer carried out of the last converted hand, which a
+      following dead button hand needs
+    '''
+    order: int = -1
+    hand_id: Optional[int] = None
+    dealer_id: Optional[str] = None
+
+    def after(self, hand: Hand) -> 'Watermark':
+        '''
+        The watermark once `hand`, the next hand after this watermark, is converted
+        '''
+        start = hand.events[0] if hand.events else None
+        dealer_id = start.player_id if start is not None and start.player_id is not None else self.dealer_id
+        return Watermark(int(hand.order), hand.id, dealer_id)
+
+def watermark_filename(filename: str) -> str:
+    return f'{log_base(filename)}.pn2ps.json'
+
+def load_watermark(filename: str) -> Optional[Watermark]:
+    '''
+    Return the watermark saved for the log `filename`, or `None` if it has none
+    '''
+    try:
+        with open(watermark_filename(filename), encoding='utf-8') as f:
+            return Watermark(**json.load(f))
+    except FileNotFoundError:
+        return None
+
+def save_watermark(filename: str, watermark: Watermark):
+    path = watermark_filename(filename)
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(watermark._asdict(), f)
+    os.replace(f'{path}.tmp', path)
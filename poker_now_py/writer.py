@@ -0,0 +1,132 @@
+'''
+writer.py
+
+Writes converted hands from a background thread, so that rendering the next
+hands carries on while earlier ones are encoded, compressed and written out.
+'''
+
+import gzip
+import os
+import queue
+import threading
+from typing import BinaryIO, List, Optional
+
+# text buffered before it is handed to the writing thread
+BUFFER_SIZE = 1 << 20
+
+# buffers waiting to be written before `write` blocks, which bounds the memory
+# used when rendering outpaces the disk
+QUEUE_SIZE = 4
+
+# queued after a buffer to have the thread flush what it has written
+FLUSH = object()
+
+class BackgroundWriter:
+    '''
+    A write-only text file that buffers what is written to it and hands the
+    buffers to a thread that writes them to `raw`, a binary file, as utf-8,
+    gzip compressing them first if `compress`. Errors writing are raised by the
+    next call to `write`, `flush` or `close`.
+    '''
+    def __init__(self, raw: BinaryIO, compress: bool = False, close_raw: bool = True,
+                 buffer_size: int = BUFFER_SIZE, queue_size: int = QUEUE_SIZE):
+        self.raw = raw
+        self.close_raw = close_raw
+        self.out = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+        self.buffer_size = buffer_size
+        self.pending: List[str] = []
+        self.pending_size = 0
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.error: Optional[BaseException] = None
+        self.closed = False
+        self.thread = threading.Thread(target=self.drain, name="BackgroundWriter", daemon=True)
+        self.thread.start()
+
+    def write(self, text: str):
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= self.buffer_size:
+            self.hand_off()
+
+    def flush(self):
+        '''
+        Have everything written so far written out, without waiting for it
+        '''
+        self.hand_off()
+        self.put(FLUSH)
+
+    def close(self):
+        '''
+        Write out everything written so far and close the file
+        '''
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            # the thread takes everything queued even after an error, so these
+            # can't block for good
+            if self.pending:
+                self.queue.put(self.pending)
+                self.pending, self.pending_size = [], 0
+            self.queue.put(None)
+            self.thread.join()
+        finally:
+            try:
+                if self.out is not self.raw:
+                    self.out.close()
+                if self.close_raw:
+                    self.raw.close()
+                else:
+                    self.raw.flush()
+            except Exception as e:
+                self.error = self.error or e
+        self.raise_error()
+
+    def hand_off(self):
+        if self.pending:
+            pending, self.pending, self.pending_size = self.pending, [], 0
+            self.put(pending)
+
+    def put(self, item):
+        self.raise_error()
+        self.queue.put(item)
+
+    def raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def drain(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                # keep taking buffers so that `write` never blocks on a full queue
+                continue
+            try:
+                if item is FLUSH:
+                    self.out.flush()
+                    if self.out is not self.raw:
+                        self.raw.flush()
+                    continue
+                text = ''.join(item)
+                if os.linesep != '\n':
+                    # as a file opened in text mode would
+                    text = text.replace('\n', os.linesep)
+                self.out.write(text.encode('utf-8'))
+            except BaseException as e:
+                self.error = e
+
+    def __enter__(self) -> 'BackgroundWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        # don't let an error writing hide the one that stopped the caller
+        try:
+            self.close()
+        except Exception:
+            pass